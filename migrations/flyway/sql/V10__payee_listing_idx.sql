@@ -0,0 +1,7 @@
+-- Payee pages are keyset scans over (last_paid, payee_id) per user, most
+-- recently paid first. CockroachDB sorts NULLs last in a DESC column, so
+-- never paid payees follow in payee_id order without a separate scan. The
+-- index stores every column the listing returns.
+CREATE INDEX IF NOT EXISTS payees_user_last_paid_idx
+    ON dev_schema.payees (user_id, last_paid DESC, payee_id)
+    STORING (name, upi_id, bank_name, ifsc, account_number, phone_number, created_at, updated_at);
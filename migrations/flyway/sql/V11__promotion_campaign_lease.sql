@@ -0,0 +1,4 @@
+-- A sender claims a campaign by setting status 'sending' and lease_until,
+-- every checkpoint extends the lease. A campaign whose sender died is
+-- claimable again once lease_until has passed.
+ALTER TABLE dev_schema.promotion_campaigns ADD COLUMN IF NOT EXISTS lease_until TIMESTAMP;
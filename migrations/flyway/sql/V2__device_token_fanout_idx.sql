@@ -0,0 +1,6 @@
+-- Push token fan-out joins devices to device_tokens for one or many users,
+-- filtered on token_purpose. Both sides are served from these indexes.
+CREATE INDEX IF NOT EXISTS devices_user_id_idx ON dev_schema.devices (user_id);
+
+CREATE INDEX IF NOT EXISTS device_tokens_device_purpose_idx
+    ON dev_schema.device_tokens (device_id, token_purpose) STORING (token);
@@ -0,0 +1,17 @@
+-- Pushes waiting for the notification dispatcher. A row is written in the
+-- same transaction as its notification and deleted once delivery settles.
+CREATE TABLE IF NOT EXISTS dev_schema.notification_outbox (
+    outbox_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    notification_id UUID NOT NULL REFERENCES dev_schema.notifications(notification_id) ON DELETE CASCADE,
+    user_id UUID NOT NULL,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    push_tokens STRING[],  -- tokens still owed a push, NULL means every device of the user
+    attempts INT NOT NULL DEFAULT 0,
+    available_at TIMESTAMP NOT NULL DEFAULT now(),  -- next time a dispatcher may claim the row
+    created_at TIMESTAMP DEFAULT now(),
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS notification_outbox_available_at_idx
+    ON dev_schema.notification_outbox (available_at);
@@ -0,0 +1,13 @@
+-- Enabled app notifications as a bitmask, one bit per NotificationFlag:
+-- 1 = transactions, 2 = promotions. Segment queries filter on the bits
+-- instead of parsing the preferences JSON of every row.
+ALTER TABLE dev_schema.notification_preferences
+    ADD COLUMN IF NOT EXISTS app_notifications INT NOT NULL DEFAULT 1;
+
+CREATE INDEX IF NOT EXISTS notification_preferences_user_id_idx
+    ON dev_schema.notification_preferences (user_id) STORING (app_notifications);
+
+-- campaign sends stream the users with promotions enabled in user_id order
+CREATE INDEX IF NOT EXISTS notification_preferences_promotions_idx
+    ON dev_schema.notification_preferences (user_id)
+    WHERE app_notifications & 2 = 2;
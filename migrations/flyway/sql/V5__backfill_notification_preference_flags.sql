@@ -0,0 +1,7 @@
+-- Backfill the bitmask from the JSON preferences, kept apart from V4 as
+-- cockroach does not allow writing a column in the transaction adding it.
+-- Missing keys take the model defaults: transactions on, promotions off.
+UPDATE dev_schema.notification_preferences
+SET app_notifications =
+    (CASE WHEN COALESCE((preferences -> 'app_notifications' ->> 'transactions')::BOOL, true) THEN 1 ELSE 0 END)
+    | (CASE WHEN COALESCE((preferences -> 'app_notifications' ->> 'promotions')::BOOL, false) THEN 2 ELSE 0 END);
@@ -0,0 +1,18 @@
+-- One row per promotion push campaign. last_user_id checkpoints the sender,
+-- a restarted run continues with the users after it.
+CREATE TABLE IF NOT EXISTS dev_schema.promotion_campaigns (
+    campaign_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    promotion_id INT NOT NULL REFERENCES dev_schema.promotions(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status STRING NOT NULL,  -- 'running', 'completed'
+    last_user_id UUID,
+    users_notified INT NOT NULL DEFAULT 0,
+    pushes_sent INT NOT NULL DEFAULT 0,
+    completed_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT now(),
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS promotion_campaigns_status_idx
+    ON dev_schema.promotion_campaigns (status);
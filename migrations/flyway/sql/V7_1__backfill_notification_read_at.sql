@@ -0,0 +1,7 @@
+-- Notifications sent before the inbox existed count as read, otherwise the
+-- unread badge and the unread inbox would show a user's whole history.
+-- Kept apart from V7 as cockroach does not allow writing a column in the
+-- transaction adding it, and ahead of V8 so the counters start from here.
+UPDATE dev_schema.notifications
+SET read_at = COALESCE(created_at, now())
+WHERE read_at IS NULL;
@@ -0,0 +1,13 @@
+-- Inbox pages are keyset scans over (created_at, notification_id) per user,
+-- newest first. The indexes store every column the inbox returns so a page
+-- never goes back to the primary index.
+ALTER TABLE dev_schema.notifications ADD COLUMN IF NOT EXISTS read_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS notifications_user_inbox_idx
+    ON dev_schema.notifications (user_id, created_at DESC, notification_id DESC)
+    STORING (title, message, type, status, method, read_at, updated_at);
+
+CREATE INDEX IF NOT EXISTS notifications_user_unread_idx
+    ON dev_schema.notifications (user_id, created_at DESC, notification_id DESC)
+    STORING (title, message, type, status, method, updated_at)
+    WHERE read_at IS NULL;
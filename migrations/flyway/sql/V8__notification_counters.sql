@@ -0,0 +1,15 @@
+-- Unread notifications per user, adjusted in the transactions that insert
+-- notifications or mark them read, so the badge is a primary key lookup.
+CREATE TABLE IF NOT EXISTS dev_schema.notification_counters (
+    user_id UUID PRIMARY KEY REFERENCES dev_schema.users(id) ON DELETE CASCADE,
+    unread INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT now(),
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+INSERT INTO dev_schema.notification_counters (user_id, unread)
+SELECT user_id, count(*)
+FROM dev_schema.notifications
+WHERE read_at IS NULL AND user_id IS NOT NULL
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET unread = excluded.unread;
@@ -0,0 +1,13 @@
+-- Push tickets expo accepted, kept until their delivery receipt is checked
+-- for DeviceNotRegistered. Receipts are ready some minutes after the send
+-- and expo keeps them for a day.
+CREATE TABLE IF NOT EXISTS dev_schema.push_receipts (
+    ticket_id STRING PRIMARY KEY,
+    token STRING NOT NULL,
+    check_after TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT now(),
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS push_receipts_check_after_idx
+    ON dev_schema.push_receipts (check_after);
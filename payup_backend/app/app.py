@@ -12,23 +12,34 @@ from .modules.profile.route_handler import ProfileHandler
 from .modules.promotion.route_handler import PromotionHandler
 from .modules.token.route_handler import TokenHandler
 from .modules.kyc.route_handler import KycHandler
+from .container import container
 
 # from .dependency.authentication import oauth2_scheme
 
 router = APIRouter()
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/signin")
 
-auth = AuthHandler("auth")
-profile = ProfileHandler("profile")
-kyc = KycHandler("kyc")
-item = ItemHandler("item")
-token = TokenHandler("token")
-promotion = PromotionHandler()
-device = DeviceHandler("device")
-device_token = DeviceTokenHandler("device_token")
-notification = NotificationHandler("notification")
-payee = PayeeHandler("payee")
-easebuzz = EasebuzzHandler("easebuzz")
+auth = AuthHandler(
+    "auth", auth_service=container.auth_service, token_service=container.token_service
+)
+profile = ProfileHandler("profile", profile_service=container.profile_service)
+kyc = KycHandler(
+    "kyc",
+    kyc_service=container.kyc_service,
+    profile_service=container.profile_service,
+)
+item = ItemHandler("item", item_service=container.item_service)
+token = TokenHandler("token", token_service=container.token_service)
+promotion = PromotionHandler(promotion_service=container.promotion_service)
+device = DeviceHandler("device", device_service=container.device_service)
+device_token = DeviceTokenHandler(
+    "device_token", device_token_service=container.device_token_service
+)
+notification = NotificationHandler(
+    "notification", notification_service=container.notification_service
+)
+payee = PayeeHandler("payee", payee_service=container.payee_service)
+easebuzz = EasebuzzHandler("easebuzz", easebuzz_service=container.easebuzz_service)
 
 router.include_router(auth.router, prefix="/auth", tags=["auth"])
 router.include_router(profile.router, prefix="/profile", tags=["profile"])
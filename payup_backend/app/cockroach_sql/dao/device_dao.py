@@ -78,11 +78,11 @@ class DeviceRepo:
                 detail=f"Device with id {device_id} for {user_id} not found",
             )
 
-        db_model.last_used = datetime.datetime.now(pytz.UTC).replace(tzinfo=None)  # type: ignore
-        db_model.updated_at = datetime.datetime.now(pytz.UTC).replace(tzinfo=None)  # type: ignore
+        db_model.last_used = datetime.now(pytz.UTC).replace(tzinfo=None)  # type: ignore
+        db_model.updated_at = datetime.now(pytz.UTC).replace(tzinfo=None)  # type: ignore
 
         session.add(db_model)
-        await session.commit()
+        await session.flush()
 
     async def delete_device_for_all_users(self, session: AsyncSession, device_id: str):
         """Delete a device for all users."""
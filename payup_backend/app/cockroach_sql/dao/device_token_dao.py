@@ -1,10 +1,12 @@
+from collections import defaultdict
 from datetime import datetime
 import logging
+from typing import Sequence
 from uuid import UUID
 import pytz
-from sqlalchemy import delete, select
+from sqlalchemy import ARRAY, String, any_, bindparam, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from payup_backend.app.cockroach_sql.schemas import DeviceTokenSchema
+from payup_backend.app.cockroach_sql.schemas import DeviceSchema, DeviceTokenSchema
 from payup_backend.app.config.errors import NotFoundError
 from payup_backend.app.modules.device_token.model import (
     DeviceToken as DeviceTokenModel,
@@ -12,9 +14,10 @@ from payup_backend.app.modules.device_token.model import (
     DeviceTokenUpdateRequest,
 )
 
-
 logger = logging.getLogger(__name__)
 
+PUSH_TOKEN_PURPOSE = "push_notification"
+
 
 class DeviceTokenRepo:
     """CRUD operations on device tokens model"""
@@ -31,6 +34,48 @@ class DeviceTokenRepo:
         db_models = result.scalars().all()
         return [DeviceTokenModel.model_validate(db_model) for db_model in db_models]
 
+    async def get_push_tokens_for_users(
+        self,
+        session: AsyncSession,
+        user_ids: Sequence[UUID],
+        token_purpose: str = PUSH_TOKEN_PURPOSE,
+    ) -> dict[UUID, list[str]]:
+        """
+        Tokens of `token_purpose` on every device of the given users, keyed by
+        user id, in one join over devices and device_tokens. Users without such
+        a token are left out.
+        """
+        if not user_ids:
+            return {}
+        stmt = (
+            select(DeviceSchema.user_id, self.repo_schema.token)
+            .join(
+                self.repo_schema,
+                self.repo_schema.device_id == DeviceSchema.device_id,
+            )
+            .where(
+                DeviceSchema.user_id.in_(user_ids),
+                self.repo_schema.token_purpose == token_purpose,
+            )
+        )
+        result = await session.execute(stmt)
+        tokens: dict[UUID, list[str]] = defaultdict(list)
+        for user_id, token in result.all():
+            tokens[user_id].append(token)
+        return dict(tokens)
+
+    async def get_push_tokens(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        token_purpose: str = PUSH_TOKEN_PURPOSE,
+    ) -> list[str]:
+        """Tokens of `token_purpose` on every device of one user"""
+        tokens = await self.get_push_tokens_for_users(
+            session=session, user_ids=[user_id], token_purpose=token_purpose
+        )
+        return tokens.get(user_id, [])
+
     async def create_device_token(
         self, session: AsyncSession, d_model: DeviceTokenCreateRequest
     ) -> DeviceTokenModel:
@@ -81,6 +126,18 @@ class DeviceTokenRepo:
         await session.flush()
         return result
 
+    async def delete_device_tokens(self, session: AsyncSession, tokens: Sequence[str]):
+        """Delete many tokens with a single `token = ANY(...)` statement"""
+        if not tokens:
+            return None
+        stmt = delete(self.repo_schema).where(
+            self.repo_schema.token
+            == any_(bindparam("tokens", list(tokens), type_=ARRAY(String)))
+        )
+        result = await session.execute(stmt)
+        await session.flush()
+        return result
+
     async def delete_tokens_for_device(self, session: AsyncSession, device_id: str):
         """Delete all tokens for a device"""
         stmt = delete(self.repo_schema).where(self.repo_schema.device_id == device_id)
@@ -1,17 +1,27 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple
 from uuid import UUID
 from fastapi import HTTPException
 import pytz
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, literal, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.future import select
 
 from payup_backend.app.modules.notification.model import (
+    NotificationFlag,
     NotificationModel,
+    NotificationOutboxModel,
     NotificationPreferenceRequest,
     NotificationPreferenceResponse,
     Preferences,
 )
-from ..schemas import NotificationPreferenceSchema, NotificationSchema
+from ..schemas import (
+    NotificationCounterSchema,
+    NotificationOutboxSchema,
+    NotificationPreferenceSchema,
+    NotificationSchema,
+)
 
 
 class NotificationPreferenceRepository:
@@ -21,13 +31,13 @@ class NotificationPreferenceRepository:
         self.repo_schema = NotificationPreferenceSchema
 
     async def create_default_preference(self, session: AsyncSession, user_id: UUID):
-        default_preferences = Preferences().dict()
+        default_preferences = Preferences().to_flags()
 
         new_preference = self.repo_schema(
-            user_id=user_id, preferences=default_preferences
+            user_id=user_id, app_notifications=int(default_preferences)
         )
         session.add(new_preference)
-        await session.commit()
+        await session.flush()
 
     async def get_preference_by_user(
         self, session: AsyncSession, user_id: UUID
@@ -42,7 +52,7 @@ class NotificationPreferenceRepository:
                 status_code=404, detail="Notification preferences not found"
             )
 
-        return NotificationPreferenceResponse(**db_model.preferences)
+        return NotificationPreferenceResponse.from_flags(db_model.app_notifications)
 
     async def update_preference(
         self,
@@ -56,15 +66,45 @@ class NotificationPreferenceRepository:
         db_model = result.scalar_one_or_none()
 
         if db_model:
-            db_model.preferences = preference.dict()
+            db_model.app_notifications = int(preference.to_flags())
             db_model.updated_at = datetime.now(pytz.UTC).replace(tzinfo=None)  # type: ignore
             await session.commit()
 
-            return NotificationPreferenceResponse(**db_model.preferences)
+            return NotificationPreferenceResponse.from_flags(db_model.app_notifications)
         else:
             # Handle the case where the preference does not exist
             raise ValueError("Preference not found")
 
+    async def stream_user_ids(
+        self,
+        session: AsyncSession,
+        flags: NotificationFlag,
+        after: Optional[UUID] = None,
+        limit: Optional[int] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[UUID]:
+        """
+        Stream, in user_id order, the ids of users with every bit of `flags`
+        enabled, starting after `after` and stopping after `limit` ids when
+        given. Rows come over a server side cursor `chunk_size` at a time, the
+        session must stay open until the iteration ends.
+        """
+        # flags are inlined so the planner can match the partial indexes
+        required = literal(int(flags), literal_execute=True)
+        stmt = (
+            select(self.repo_schema.user_id)
+            .where(self.repo_schema.app_notifications.op("&")(required) == required)
+            .order_by(self.repo_schema.user_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        if after is not None:
+            stmt = stmt.where(self.repo_schema.user_id > after)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = await session.stream_scalars(stmt)
+        async for user_id in result:
+            yield user_id
+
 
 class NotificationRepository:
     """CRUD operations on notifications model"""
@@ -78,14 +118,25 @@ class NotificationRepository:
         """Add a new notification"""
         db_model = self.repo_schema(**notification.model_dump())
         session.add(db_model)
-        await session.commit()
+        await session.flush()
+
+    async def add_notifications(
+        self, session: AsyncSession, notifications: Sequence[NotificationModel]
+    ):
+        """Insert many notifications with one multi-row INSERT"""
+        if not notifications:
+            return
+        stmt = insert(self.repo_schema).values(
+            [notification.model_dump() for notification in notifications]
+        )
+        await session.execute(stmt)
 
     async def update_notification(
         self, session: AsyncSession, notification: NotificationModel
     ):
         """Update an existing notification"""
         stmt = select(self.repo_schema).filter(
-            self.repo_schema.notification_id == notification.id
+            self.repo_schema.notification_id == notification.notification_id
         )
         result = await session.execute(stmt)
         db_model = result.scalar_one_or_none()
@@ -93,12 +144,213 @@ class NotificationRepository:
         if db_model:
             db_model.status = notification.status
             db_model.updated_at = datetime.now(pytz.UTC).replace(tzinfo=None)
+            await session.flush()
 
-    async def get_notifications_by_user(
-        self, session: AsyncSession, user_id: UUID
+    async def update_status(
+        self, session: AsyncSession, notification_id: UUID, status: str
+    ):
+        """Set the delivery status of a notification without loading it"""
+        stmt = (
+            update(self.repo_schema)
+            .where(self.repo_schema.notification_id == notification_id)
+            .values(
+                status=status,
+                updated_at=datetime.now(pytz.UTC).replace(tzinfo=None),
+            )
+        )
+        await session.execute(stmt)
+
+    async def get_inbox(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        limit: int,
+        before: Optional[Tuple[datetime, UUID]] = None,
+        unread_only: bool = False,
     ) -> list[NotificationModel]:
-        """Get notifications list for a user"""
-        stmt = select(self.repo_schema).filter(self.repo_schema.user_id == user_id)
+        """
+        A page of a user's notifications, newest first. `before` is the
+        (created_at, notification_id) of the last row of the previous page,
+        so each page is a range scan on the inbox index however deep it is.
+        """
+        stmt = select(self.repo_schema).where(self.repo_schema.user_id == user_id)
+        if before is not None:
+            stmt = stmt.where(
+                tuple_(self.repo_schema.created_at, self.repo_schema.notification_id)
+                < tuple_(*before)
+            )
+        if unread_only:
+            stmt = stmt.where(self.repo_schema.read_at.is_(None))
+        stmt = stmt.order_by(
+            self.repo_schema.created_at.desc(),
+            self.repo_schema.notification_id.desc(),
+        ).limit(limit)
         result = await session.execute(stmt)
         db_models = result.scalars().all()
         return [NotificationModel.model_validate(db_model) for db_model in db_models]
+
+    async def mark_read(
+        self, session: AsyncSession, user_id: UUID, notification_ids: Sequence[UUID]
+    ) -> list[UUID]:
+        """Mark a user's unread notifications read, returns the ids changed"""
+        if not notification_ids:
+            return []
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        stmt = (
+            update(self.repo_schema)
+            .where(
+                self.repo_schema.user_id == user_id,
+                self.repo_schema.notification_id.in_(notification_ids),
+                self.repo_schema.read_at.is_(None),
+            )
+            .values(read_at=current_time, updated_at=current_time)
+            .returning(self.repo_schema.notification_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+
+class NotificationCounterRepository:
+    """Per user unread notification counts, kept in step with notifications"""
+
+    def __init__(self):
+        self.repo_schema = NotificationCounterSchema
+
+    async def add_unread(self, session: AsyncSession, counts: Mapping[UUID, int]):
+        """
+        Add `counts[user_id]` to each user's unread count, negative amounts for
+        notifications marked read. Increments go in one upsert. Decrements
+        only update existing rows and stop at zero, so a user without a
+        counter row never gets a negative count. Call it in the transaction
+        that inserts or reads the notifications.
+        """
+        increments = {
+            user_id: amount for user_id, amount in counts.items() if amount > 0
+        }
+        decrements: Dict[int, List[UUID]] = {}
+        for user_id, amount in counts.items():
+            if amount < 0:
+                decrements.setdefault(amount, []).append(user_id)
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+
+        if increments:
+            stmt = insert(self.repo_schema).values(
+                [
+                    {
+                        "user_id": user_id,
+                        "unread": amount,
+                        "created_at": current_time,
+                        "updated_at": current_time,
+                    }
+                    for user_id, amount in sorted(increments.items())
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[self.repo_schema.user_id],
+                set_={
+                    "unread": self.repo_schema.unread + stmt.excluded.unread,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            await session.execute(stmt)
+
+        for amount, user_ids in sorted(decrements.items()):
+            stmt = (
+                update(self.repo_schema)
+                .where(self.repo_schema.user_id.in_(sorted(user_ids)))
+                .values(
+                    unread=func.greatest(self.repo_schema.unread + amount, 0),
+                    updated_at=current_time,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.execute(stmt)
+
+    async def get_unread(self, session: AsyncSession, user_id: UUID) -> int:
+        stmt = select(self.repo_schema.unread).where(
+            self.repo_schema.user_id == user_id
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none() or 0
+
+
+class NotificationOutboxRepository:
+    """Pushes waiting for delivery, written with their notification row"""
+
+    def __init__(self):
+        self.repo_schema = NotificationOutboxSchema
+
+    async def add_outbox(self, session: AsyncSession, outbox: NotificationOutboxModel):
+        """Queue a push, in the transaction that creates the notification"""
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        db_model = self.repo_schema(
+            **outbox.model_dump(), updated_at=current_time  # type: ignore
+        )
+        session.add(db_model)
+        await session.flush()
+
+    async def claim_batch(
+        self, session: AsyncSession, limit: int, lease: float
+    ) -> list[NotificationOutboxModel]:
+        """
+        Claim up to `limit` due rows, skipping rows another dispatcher holds
+        locked. Claimed rows get their attempt counted and are hidden for
+        `lease` seconds, a dispatcher that dies mid delivery releases them
+        once the lease runs out.
+        """
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        claimable = (
+            select(self.repo_schema.outbox_id)
+            .where(self.repo_schema.available_at <= current_time)
+            .order_by(self.repo_schema.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(self.repo_schema)
+            .where(self.repo_schema.outbox_id.in_(claimable.scalar_subquery()))
+            .values(
+                attempts=self.repo_schema.attempts + 1,
+                available_at=current_time + timedelta(seconds=lease),
+                updated_at=current_time,
+            )
+            .returning(*self.repo_schema.__table__.c)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return [
+            NotificationOutboxModel.model_validate(dict(row))
+            for row in result.mappings().all()
+        ]
+
+    async def reschedule(
+        self,
+        session: AsyncSession,
+        outbox_id: UUID,
+        available_at: datetime,
+        push_tokens: Optional[Sequence[str]] = None,
+    ):
+        """Make a claimed row due again at `available_at`"""
+        stmt = (
+            update(self.repo_schema)
+            .where(self.repo_schema.outbox_id == outbox_id)
+            .values(
+                available_at=available_at,
+                push_tokens=push_tokens,
+                updated_at=datetime.now(pytz.UTC).replace(tzinfo=None),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
+
+    async def delete_outbox(self, session: AsyncSession, outbox_ids: Sequence[UUID]):
+        """Drop rows whose delivery has settled"""
+        if not outbox_ids:
+            return
+        stmt = (
+            delete(self.repo_schema)
+            .where(self.repo_schema.outbox_id.in_(outbox_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
@@ -1,10 +1,12 @@
 """otp crud to database"""
 
 import logging
+from datetime import datetime, timedelta
 from uuid import UUID
 from typing import Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update, Column
+from sqlalchemy import select, delete, update, case, literal, Column, CTE
+from sqlalchemy.dialects.postgresql import insert
 
 from payup_backend.app.cockroach_sql.schemas import Profile
 
@@ -59,6 +61,62 @@ class OTPRepo:
         p_resp = OTPModel.model_validate(db_model)
         return p_resp
 
+    async def issue_otp(
+        self,
+        session: AsyncSession,
+        profile: CTE,
+        m_otp: int,
+        expires_at: datetime,
+        now: datetime,
+        resend_after: timedelta = timedelta(minutes=1),
+    ) -> Optional[OTPModel]:
+        """
+        Store a fresh otp for the profile selected by `profile` in one statement.
+
+        A new row starts with MAX_SMS_ATTEMPTS - 1 attempts. An existing row is
+        reset once its attempts are used up, otherwise it is decremented, but only
+        if it was last issued `resend_after` ago or earlier. Returns None when the
+        resend window blocked the update.
+        """
+        first_attempt = constants.TWILIO.MAX_SMS_ATTEMPTS - 1
+        stmt = insert(self.repo_schema).from_select(
+            [
+                "id",
+                "m_otp",
+                "attempt_remains",
+                "expires_at",
+                "created_at",
+                "updated_at",
+            ],
+            select(
+                profile.c.id,
+                literal(m_otp),
+                literal(first_attempt),
+                literal(expires_at),
+                literal(now),
+                literal(now),
+            ),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.repo_schema.id],
+            set_={
+                "m_otp": stmt.excluded.m_otp,
+                "expires_at": stmt.excluded.expires_at,
+                "attempt_remains": case(
+                    (self.repo_schema.attempt_remains == 0, first_attempt),
+                    else_=self.repo_schema.attempt_remains - 1,
+                ),
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=(self.repo_schema.attempt_remains == 0)
+            | (self.repo_schema.updated_at <= now - resend_after),
+        ).returning(*self.repo_schema.__table__.c)
+        result = await session.execute(stmt)
+        db_model = result.first()
+        if db_model is None:
+            return None
+        return OTPModel.model_validate(db_model)
+
     async def update_obj(
         self,
         session: AsyncSession,
@@ -1,7 +1,9 @@
 from datetime import datetime
+from typing import Optional, Tuple
 from uuid import UUID
 from fastapi import HTTPException
 import pytz
+from sqlalchemy import and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -61,16 +63,47 @@ class PayeeRepository:
         session.add(relation)
 
         await session.refresh(new_payee)
-        return PayeeModel(**new_payee.__dict__)
+        return PayeeModel.model_validate(new_payee)
 
     async def get_payees_by_user(
-        self, session: AsyncSession, user_id: UUID
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        limit: int,
+        after: Optional[Tuple[Optional[datetime], UUID]] = None,
     ) -> list[PayeeModel]:
-        """Retrieve all payees for a given user"""
-        stmt = select(self.repo_schema).filter(self.repo_schema.user_id == user_id)
+        """
+        A page of a user's payees, most recently paid first and never paid
+        ones last. `after` is the (last_paid, payee_id) of the last row of the
+        previous page, so each page is a range scan on the user's payee index.
+        """
+        stmt = select(self.repo_schema).where(self.repo_schema.user_id == user_id)
+        if after is not None:
+            last_paid, payee_id = after
+            if last_paid is None:
+                # already in the never paid tail
+                stmt = stmt.where(
+                    self.repo_schema.last_paid.is_(None),
+                    self.repo_schema.payee_id > payee_id,
+                )
+            else:
+                stmt = stmt.where(
+                    or_(
+                        self.repo_schema.last_paid < last_paid,
+                        and_(
+                            self.repo_schema.last_paid == last_paid,
+                            self.repo_schema.payee_id > payee_id,
+                        ),
+                        self.repo_schema.last_paid.is_(None),
+                    )
+                )
+        stmt = stmt.order_by(
+            self.repo_schema.last_paid.desc().nulls_last(),
+            self.repo_schema.payee_id,
+        ).limit(limit)
         result = await session.execute(stmt)
         db_models = result.scalars().all()
-        return [PayeeModel(**db_model.__dict__) for db_model in db_models]
+        return [PayeeModel.model_validate(db_model) for db_model in db_models]
 
     async def delete_payee(
         self, session: AsyncSession, user_id: UUID, payee_id: UUID, profile_id: UUID
@@ -1,10 +1,13 @@
 """profile crud to database"""
 
 import logging
+import uuid
+from datetime import datetime
 from uuid import UUID
 from typing import Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, Column
+from sqlalchemy import select, delete, literal, Column, CTE
+from sqlalchemy.dialects.postgresql import insert
 
 from ...modules.profile.model import (
     ProfileCreate,
@@ -12,7 +15,13 @@ from ...modules.profile.model import (
     Profile as ProfileModel,
     ProfileUpdateRequest,
 )
-from ..schemas import Profile as ProfileSchema, User as UserSchema
+from ...modules.notification.model import Preferences
+from ..db_enums import UserType
+from ..schemas import (
+    NotificationPreferenceSchema,
+    Profile as ProfileSchema,
+    User as UserSchema,
+)
 from ...config.errors import DatabaseError
 from ...config.errors import NotFoundError
 from ...models.py_models import BaseResponse
@@ -26,6 +35,87 @@ class ProfileRepo:
     def __init__(self):
         self.repo_schema = ProfileSchema
 
+    def bootstrap_cte(self, phone_number: str, now: datetime) -> CTE:
+        """
+        CTE yielding the id of the profile owning `phone_number`, creating the
+        profile, its inactive user and default notification preferences when the
+        number is new. Only the INSERTs of a brand new profile write anything,
+        an existing number falls through to the plain lookup.
+        """
+        new_profile = (
+            insert(self.repo_schema)
+            .values(
+                id=uuid.uuid4(),
+                phone_number=phone_number,
+                kyc_complete=False,
+                kyc_pan=False,
+                kyc_uidai=False,
+                onboarded=False,
+                created_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_nothing(index_elements=[self.repo_schema.phone_number])
+            .returning(self.repo_schema.id)
+            .cte("new_profile")
+        )
+        new_user = (
+            insert(UserSchema)
+            .from_select(
+                [
+                    "id",
+                    "profile_id",
+                    "user_type",
+                    "is_active",
+                    "phone_lock",
+                    "created_at",
+                    "updated_at",
+                ],
+                select(
+                    literal(uuid.uuid4(), UserSchema.id.type),
+                    new_profile.c.id,
+                    literal(UserType.USER.value),
+                    literal(False),
+                    literal(False),
+                    literal(now),
+                    literal(now),
+                ),
+            )
+            .returning(UserSchema.id)
+            .cte("new_user")
+        )
+        new_preference = (
+            insert(NotificationPreferenceSchema)
+            .from_select(
+                [
+                    "preference_id",
+                    "user_id",
+                    "app_notifications",
+                    "created_at",
+                    "updated_at",
+                ],
+                select(
+                    literal(
+                        uuid.uuid4(), NotificationPreferenceSchema.preference_id.type
+                    ),
+                    new_user.c.id,
+                    literal(int(Preferences().to_flags())),
+                    literal(now),
+                    literal(now),
+                ),
+            )
+            .cte("new_preference")
+        )
+        return (
+            select(new_profile.c.id)
+            .union_all(
+                select(self.repo_schema.id).where(
+                    self.repo_schema.phone_number == phone_number
+                )
+            )
+            .add_cte(new_user, new_preference)
+            .cte("profile")
+        )
+
     async def get_objs(
         self, session: AsyncSession, skip: int = 0, limit: int = 100
     ) -> list[ProfileModel]:
@@ -1,8 +1,16 @@
+from datetime import datetime, timedelta
 import logging
-from ..schemas import PromotionSchema
-from sqlalchemy import select
+from typing import Optional
+from uuid import UUID
+import pytz
+from ..schemas import PromotionCampaignSchema, PromotionSchema
+from sqlalchemy import and_, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from ...modules.promotion.model import Promotion as PromotionModel
+from ...modules.promotion.model import (
+    CampaignStatus,
+    Promotion as PromotionModel,
+    PromotionCampaign,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,3 +39,132 @@ class PromotionRepo:
         ]
 
         return response
+
+    async def get_promotion_by_id(
+        self, session: AsyncSession, promotion_id: int
+    ) -> Optional[PromotionModel]:
+        """get a promotion by primary key"""
+        stmt = select(self._repo_schema).where(self._repo_schema.id == promotion_id)
+        result = await session.execute(stmt)
+        db_model = result.scalars().first()
+        if db_model is None:
+            return None
+        return PromotionModel(
+            id=db_model.id,
+            discount=db_model.discount,
+            title=db_model.title,
+            description=db_model.description,
+            image_url=db_model.image_url,
+            created_at=db_model.created_at,
+            updated_at=db_model.updated_at,
+        )
+
+
+class PromotionCampaignRepo:
+    """promotion push campaigns and their send checkpoints"""
+
+    def __init__(self):
+        self._repo_schema = PromotionCampaignSchema
+
+    async def create_campaign(
+        self, session: AsyncSession, campaign: PromotionCampaign
+    ) -> PromotionCampaign:
+        db_model = self._repo_schema(**campaign.model_dump())
+        session.add(db_model)
+        await session.flush()
+        return campaign
+
+    async def claim_campaign(
+        self, session: AsyncSession, lease: float
+    ) -> Optional[PromotionCampaign]:
+        """
+        Claim the oldest campaign not sent to every user yet, skipping rows
+        other senders hold locked. The claim lasts `lease` seconds and every
+        checkpoint extends it, a campaign whose sender died is claimable again
+        once its lease lapses.
+        """
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        claimable = (
+            select(self._repo_schema.campaign_id)
+            .where(
+                or_(
+                    self._repo_schema.status == CampaignStatus.RUNNING.value,
+                    and_(
+                        self._repo_schema.status == CampaignStatus.SENDING.value,
+                        self._repo_schema.lease_until < current_time,
+                    ),
+                )
+            )
+            .order_by(self._repo_schema.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(self._repo_schema)
+            .where(self._repo_schema.campaign_id.in_(claimable.scalar_subquery()))
+            .values(
+                status=CampaignStatus.SENDING.value,
+                lease_until=current_time + timedelta(seconds=lease),
+                updated_at=current_time,
+            )
+            .returning(self._repo_schema)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        db_model = result.scalars().first()
+        if db_model is None:
+            return None
+        return PromotionCampaign.model_validate(db_model)
+
+    async def save_checkpoint(
+        self,
+        session: AsyncSession,
+        campaign_id: UUID,
+        last_user_id: UUID,
+        users_notified: int,
+        pushes_sent: int,
+        lease: float,
+    ) -> bool:
+        """
+        Move the checkpoint past a sent chunk, add its counts and extend the
+        lease. The checkpoint never moves backwards, False means another
+        sender got further with the campaign and this one should stop.
+        """
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        stmt = (
+            update(self._repo_schema)
+            .where(
+                self._repo_schema.campaign_id == campaign_id,
+                self._repo_schema.status == CampaignStatus.SENDING.value,
+                or_(
+                    self._repo_schema.last_user_id.is_(None),
+                    self._repo_schema.last_user_id < last_user_id,
+                ),
+            )
+            .values(
+                last_user_id=last_user_id,
+                users_notified=self._repo_schema.users_notified + users_notified,
+                pushes_sent=self._repo_schema.pushes_sent + pushes_sent,
+                lease_until=current_time + timedelta(seconds=lease),
+                updated_at=current_time,
+            )
+            .returning(self._repo_schema.campaign_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+    async def complete_campaign(self, session: AsyncSession, campaign_id: UUID):
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        stmt = (
+            update(self._repo_schema)
+            .where(self._repo_schema.campaign_id == campaign_id)
+            .values(
+                status=CampaignStatus.COMPLETED.value,
+                lease_until=None,
+                completed_at=current_time,
+                updated_at=current_time,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
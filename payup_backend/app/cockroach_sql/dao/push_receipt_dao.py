@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import logging
+from typing import Sequence
+import pytz
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from payup_backend.app.cockroach_sql.schemas import PushReceiptSchema
+from payup_backend.app.modules.notification.model import PushReceiptModel
+
+logger = logging.getLogger(__name__)
+
+
+class PushReceiptRepo:
+    """expo push tickets whose delivery receipts are still to be checked"""
+
+    def __init__(self):
+        self.repo_schema = PushReceiptSchema
+
+    async def add_receipts(
+        self, session: AsyncSession, receipts: Sequence[PushReceiptModel]
+    ):
+        """Record accepted tickets with one multi-row INSERT"""
+        if not receipts:
+            return
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        stmt = (
+            insert(self.repo_schema)
+            .values(
+                [
+                    {**receipt.model_dump(), "updated_at": current_time}
+                    for receipt in receipts
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[self.repo_schema.ticket_id])
+        )
+        await session.execute(stmt)
+
+    async def claim_due(
+        self, session: AsyncSession, limit: int, lease: float
+    ) -> list[PushReceiptModel]:
+        """
+        Claim up to `limit` tickets due for a receipt check, skipping rows
+        other pollers hold locked. Claimed rows are due again after `lease`
+        seconds unless deleted first, e.g. when expo has no receipt yet.
+        """
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        claimable = (
+            select(self.repo_schema.ticket_id)
+            .where(self.repo_schema.check_after <= current_time)
+            .order_by(self.repo_schema.check_after)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(self.repo_schema)
+            .where(self.repo_schema.ticket_id.in_(claimable.scalar_subquery()))
+            .values(
+                check_after=current_time + timedelta(seconds=lease),
+                updated_at=current_time,
+            )
+            .returning(
+                self.repo_schema.ticket_id,
+                self.repo_schema.token,
+                self.repo_schema.check_after,
+                self.repo_schema.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return [PushReceiptModel.model_validate(dict(row)) for row in result.mappings()]
+
+    async def delete_receipts(self, session: AsyncSession, ticket_ids: Sequence[str]):
+        """Forget tickets whose receipt was read or will never come"""
+        if not ticket_ids:
+            return
+        stmt = (
+            delete(self.repo_schema)
+            .where(self.repo_schema.ticket_id.in_(ticket_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
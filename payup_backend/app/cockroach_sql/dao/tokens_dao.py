@@ -1,8 +1,10 @@
 """refresh_token_entity crud to database"""
 
 import logging
+from datetime import datetime
 from uuid import UUID
 from typing import Any, Optional
+import pytz
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, Column
 from sqlalchemy.dialects import postgresql
@@ -206,13 +208,40 @@ class AccessTokenBlacklistRepo:
         stmt = select(self.repo_schema).filter(self.repo_schema.id == obj_id)
         result = await session.execute(stmt)
         db_model = result.scalars().first()
+        if db_model is None:
+            return None
         return AccessTokenBlacklistModel.model_validate(db_model)
 
+    async def get_active_ids(
+        self, session: AsyncSession, created_after: Optional[datetime] = None
+    ) -> list[tuple[UUID, datetime, datetime]]:
+        """
+        get (jti, expires_on, created_at) of every access_token_blacklist not yet expired,
+        optionally only the ones created after a watermark
+        """
+        stmt = select(
+            self.repo_schema.id,
+            self.repo_schema.expires_on,
+            self.repo_schema.created_at,
+        ).where(
+            self.repo_schema.expires_on > datetime.now(pytz.UTC).replace(tzinfo=None)
+        )
+        if created_after is not None:
+            stmt = stmt.where(self.repo_schema.created_at > created_after)
+        result = await session.execute(stmt)
+        return [(row.id, row.expires_on, row.created_at) for row in result.all()]
+
     async def create_obj(
         self, session: AsyncSession, p_model: AccessTokenBlacklistCreate
     ) -> AccessTokenBlacklistModel:
         """create access_token_blacklist entity in db"""
-        db_model = self.repo_schema(**p_model.model_dump(exclude=set(), by_alias=True))
+        # created_at is the watermark the revocation index polls on
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        db_model = self.repo_schema(
+            **p_model.model_dump(exclude=set(), by_alias=True),
+            created_at=current_time,
+            updated_at=current_time,
+        )
         logger.info("db_model : %s", db_model)
         session.add(db_model)
         await session.flush()
@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import (
 
 from ..config.constants import get_settings
 from ..helperClass.utils import get_db_cert
+from .pool import InstrumentedAsyncQueuePool, register_pool_gauges
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,7 @@ logger = logging.getLogger(__name__)
 class Database:
     def __init__(self):
         self._engine = None
+        self._sessionmaker = None
         self._db = ""
         self._connection = None
 
@@ -55,19 +57,26 @@ class Database:
             self._engine = create_async_engine(
                 conn_str,
                 connect_args={"ssl": ssl_context},
-                pool_pre_ping=True,
-                pool_recycle=1800,
-                pool_size=5,
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_size=config.COCKROACH.POOL_SIZE,
+                max_overflow=config.COCKROACH.POOL_MAX_OVERFLOW,
+                pool_timeout=config.COCKROACH.POOL_TIMEOUT,
+                pool_recycle=config.COCKROACH.POOL_RECYCLE,
+                pool_pre_ping=config.COCKROACH.POOL_PRE_PING,
             )
+            register_pool_gauges(self._engine)
         return self._engine
 
     def get_session(self) -> async_sessionmaker:
         """
-        Returns a new async sessionmaker object.
+        Returns the process wide async sessionmaker object, created on first use.
         """
-        async_engine = self.engine  # Access the property, not call it as a method
-        async_session = async_sessionmaker(bind=async_engine, expire_on_commit=False)
-        return async_session
+        if self._sessionmaker is None:
+            async_engine = self.engine  # Access the property, not call it as a method
+            self._sessionmaker = async_sessionmaker(
+                bind=async_engine, expire_on_commit=False
+            )
+        return self._sessionmaker
 
 
 database = Database()
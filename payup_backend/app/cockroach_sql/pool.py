@@ -0,0 +1,47 @@
+"""connection pool used by the async engine, instrumented for the /metrics endpoint"""
+
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from ..helperClass.metrics import metrics
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool recording checkout wait time, checkouts that opened an
+    overflow connection and checkout timeouts. Checkout wait includes the
+    pre-ping round trip when enabled.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        overflow_before = self.overflow()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.inc("db.pool.checkout_timeouts")
+            raise
+        finally:
+            metrics.observe(
+                "db.pool.checkout_wait_seconds", time.perf_counter() - start
+            )
+
+        metrics.inc("db.pool.checkouts")
+        # overflow() only grows when a checkout opens a new connection, past
+        # pool_size that connection is an overflow one
+        overflow_after = self.overflow()
+        if overflow_after > 0 and overflow_after > overflow_before:
+            metrics.inc("db.pool.overflow_checkouts")
+        return connection
+
+
+def register_pool_gauges(engine: AsyncEngine):
+    """expose the live state of an engine's pool, read through the engine so a
+    recreated pool is picked up"""
+    metrics.gauge("db.pool.size", lambda: engine.pool.size())
+    metrics.gauge("db.pool.checked_out", lambda: engine.pool.checkedout())
+    metrics.gauge("db.pool.checked_in", lambda: engine.pool.checkedin())
+    metrics.gauge("db.pool.overflow", lambda: max(engine.pool.overflow(), 0))
@@ -5,6 +5,7 @@ import pytz
 from datetime import datetime
 
 from sqlalchemy import (
+    ARRAY,
     Boolean,
     Column,
     ForeignKey,
@@ -14,7 +15,6 @@ from sqlalchemy import (
     DateTime,
     SmallInteger,
     BINARY,
-    JSON,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
@@ -274,15 +274,36 @@ class PromotionSchema(Base):
     )
 
 
+class PromotionCampaignSchema(Base):
+    __tablename__ = "promotion_campaigns"
+    __table_args__ = {"schema": schema}
+
+    campaign_id = Column(UUID, primary_key=True, default=uuid.uuid4)
+    promotion_id = Column(
+        Integer,
+        ForeignKey(f"{schema}.promotions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    title = Column(String, nullable=False)
+    message = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    last_user_id = Column(UUID, nullable=True)
+    users_notified = Column(Integer, nullable=False, default=0)
+    pushes_sent = Column(Integer, nullable=False, default=0)
+    lease_until = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+
 class NotificationPreferenceSchema(Base):
     __tablename__ = "notification_preferences"
-    __table_args__ = {"schema": "dev_schema"}
+    __table_args__ = {"schema": schema}
 
     preference_id = Column(UUID, primary_key=True, default=uuid.uuid4)
     user_id = Column(
-        UUID, ForeignKey("dev_schema.users.id", ondelete="CASCADE"), nullable=False
+        UUID, ForeignKey(f"{schema}.users.id", ondelete="CASCADE"), nullable=False
     )
-    preferences = Column(JSON, default=dict)
+    # NotificationFlag bits of the enabled app notifications
+    app_notifications = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.now(pytz.UTC).replace(tzinfo=None))
     updated_at = Column(
         DateTime,
@@ -339,9 +360,46 @@ class NotificationSchema(Base):
     status = Column(String, nullable=False)
     type = Column(String, nullable=False)
     method = Column(String, nullable=False)
+    read_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.now(pytz.UTC).replace(tzinfo=None))
     updated_at = Column(
         DateTime,
         default=datetime.now(pytz.UTC).replace(tzinfo=None),
         onupdate=datetime.now(pytz.UTC).replace(tzinfo=None),
     )
+
+
+class NotificationCounterSchema(Base):
+    __tablename__ = "notification_counters"
+    __table_args__ = {"schema": schema}
+
+    user_id = Column(
+        UUID, ForeignKey(f"{schema}.users.id", ondelete="CASCADE"), primary_key=True
+    )
+    unread = Column(Integer, nullable=False, default=0)
+
+
+class NotificationOutboxSchema(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = {"schema": schema}
+    outbox_id = Column(UUID, primary_key=True, default=uuid.uuid4)
+    notification_id = Column(
+        UUID,
+        ForeignKey(f"{schema}.notifications.notification_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_id = Column(UUID, nullable=False)
+    title = Column(String, nullable=False)
+    message = Column(String, nullable=False)
+    push_tokens = Column(ARRAY(String), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False)
+
+
+class PushReceiptSchema(Base):
+    __tablename__ = "push_receipts"
+    __table_args__ = {"schema": schema}
+
+    ticket_id = Column(String, primary_key=True)
+    token = Column(String, nullable=False)
+    check_after = Column(DateTime, nullable=False)
@@ -0,0 +1,81 @@
+"""async transaction runner retrying CockroachDB serialization failures"""
+
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+T = TypeVar("T")
+
+# sqlstate cockroach uses for "restart transaction" errors
+SERIALIZATION_FAILURE = "40001"
+
+
+def is_retryable(err: DBAPIError) -> bool:
+    """true when the error is a serialization failure cockroach asks to retry"""
+    orig = getattr(err, "orig", None)
+    for candidate in (orig, getattr(orig, "__cause__", None)):
+        if getattr(candidate, "sqlstate", None) == SERIALIZATION_FAILURE:
+            return True
+        if getattr(candidate, "pgcode", None) == SERIALIZATION_FAILURE:
+            return True
+    return False
+
+
+def retry_backoff(retry_count: int, base_backoff: float, max_backoff: float) -> float:
+    """exponential backoff with full jitter"""
+    return random.uniform(0, min(max_backoff, base_backoff * (2**retry_count)))
+
+
+async def run_transaction(
+    sessionmaker: async_sessionmaker,
+    callback: Callable[[AsyncSession], Awaitable[T]],
+    max_retries: Optional[int] = None,
+    base_backoff: Optional[float] = None,
+    max_backoff: Optional[float] = None,
+) -> T:
+    """
+    Run `callback(session)` inside a transaction, retrying it on 40001 errors.
+
+    `callback` may be called more than once, it should have no side effects other
+    than writes through the given session and must not commit or roll back itself,
+    the transaction is committed when it returns. Any other exception, including
+    HTTPException raised by the callback, rolls back and propagates unchanged.
+    """
+    if max_retries is None:
+        max_retries = constants.COCKROACH.TXN_MAX_RETRIES
+    if base_backoff is None:
+        base_backoff = constants.COCKROACH.TXN_BASE_BACKOFF
+    if max_backoff is None:
+        max_backoff = constants.COCKROACH.TXN_MAX_BACKOFF
+
+    retry_count = 0
+    while True:
+        try:
+            async with sessionmaker() as session:
+                async with session.begin():
+                    return await callback(session)
+        except DBAPIError as err:
+            if not is_retryable(err) or retry_count >= max_retries:
+                raise
+            retry_count += 1
+            metrics.inc("db.txn.retries")
+            delay = retry_backoff(retry_count, base_backoff, max_backoff)
+            logger.warning(
+                "transaction restart %s/%s in %.3fs : %s",
+                retry_count,
+                max_retries,
+                delay,
+                err.orig,
+            )
+            await asyncio.sleep(delay)
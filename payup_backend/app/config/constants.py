@@ -1,6 +1,5 @@
 """loads environment constants in code"""
 
-import os
 from functools import lru_cache
 from typing import Any, Union, Optional
 from pydantic import model_validator
@@ -13,6 +12,10 @@ class PayupSettings(BaseSettings):
     PAN_KEY: bytes
     UIDAI_KEY: bytes
 
+    # per worker cache of each user's first payee page, seconds
+    PAYEE_CACHE_SIZE: int = 10_000
+    PAYEE_CACHE_TTL: float = 60
+
     model_config = SettingsConfigDict(
         env_file=".env", env_prefix="payup_", extra="ignore", env_file_encoding="utf-8"
     )
@@ -39,6 +42,21 @@ class SandboxSettings(BaseSettings):
     API_KEY: str
     SECRET_KEY: str
     ACCESS_TOKEN: str
+    HTTP2: bool = True
+    MAX_CONNECTIONS: int = 20
+    MAX_KEEPALIVE_CONNECTIONS: int = 10
+    KEEPALIVE_EXPIRY: float = 30
+    # seconds, the read timeout is per endpoint
+    CONNECT_TIMEOUT: float = 5
+    AUTH_TIMEOUT: float = 10
+    PAN_TIMEOUT: float = 20
+    AADHAAR_OTP_TIMEOUT: float = 20
+    AADHAAR_VERIFY_TIMEOUT: float = 20
+    UPI_TIMEOUT: float = 20
+    # access token refresh, seconds
+    TOKEN_REFRESH_MARGIN: float = 300
+    TOKEN_DEFAULT_TTL: float = 86400
+    TOKEN_RETRY_INTERVAL: float = 30
 
     model_config = SettingsConfigDict(
         env_file=".env", env_prefix="sandbox_", extra="ignore"
@@ -47,18 +65,23 @@ class SandboxSettings(BaseSettings):
     def __str__(self):
         return settings_as_string(self.model_dump(), "SANDBOX")
 
-    def update_access_token(self, new_token: str):
-        """Update the access token in settings and environment."""
-        self.ACCESS_TOKEN = new_token
-        os.environ["SANDBOX_ACCESS_TOKEN"] = new_token
-        get_settings.cache_clear()
-
 
 class AttestrSettings(BaseSettings):
     """creates a singleton constants instance"""
 
     BASE_URL: str
     ACCESS_TOKEN: str
+    MAX_CONNECTIONS: int = 20
+    MAX_KEEPALIVE_CONNECTIONS: int = 10
+    KEEPALIVE_EXPIRY: float = 30
+    # verifications allowed in flight per worker, the rest wait for a slot
+    MAX_CONCURRENCY: int = 10
+    CONNECT_TIMEOUT: float = 5
+    TIMEOUT: float = 20
+    # upi / bank verification results, seconds
+    VERIFY_CACHE_SIZE: int = 10_000
+    VERIFY_CACHE_TTL: float = 86400
+    VERIFY_CACHE_NEGATIVE_TTL: float = 600
 
     model_config = SettingsConfigDict(
         env_file=".env", env_prefix="attestr_", extra="ignore"
@@ -77,6 +100,14 @@ class CockroachSettings(BaseSettings):
     DB: str
     DB_URI: str
     CERT_PATH: Optional[str] = None
+    POOL_SIZE: int = 5
+    POOL_MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30  # in seconds
+    POOL_RECYCLE: int = 1800  # in seconds
+    POOL_PRE_PING: bool = True
+    TXN_MAX_RETRIES: int = 5
+    TXN_BASE_BACKOFF: float = 0.05  # in seconds
+    TXN_MAX_BACKOFF: float = 2  # in seconds
 
     model_config = SettingsConfigDict(
         env_file=".env", env_prefix="cockroach_", extra="ignore"
@@ -95,6 +126,11 @@ class TokenSettings(BaseSettings):
     AUDIENCE: Union[str, list[str]]
     ACCESS_TOKEN_DURATION: int  # in minutes
     REFRESH_TOKEN_DURATION: int  # in minutes
+    BLACKLIST_CACHE_SIZE: int = 100_000
+    BLACKLIST_FILTER_REFRESH: int = 600  # in seconds
+    BLACKLIST_POLL_INTERVAL: int = 5  # in seconds
+    BLACKLIST_FILTER_ERROR_RATE: float = 0.001
+    DECODE_CACHE_SIZE: int = 10_000
 
     model_config = SettingsConfigDict(env_file=".env", env_prefix="jt_", extra="ignore")
 
@@ -120,6 +156,9 @@ class TwilioSettings(BaseSettings):
     SMS_SERVICE_SID: str
     PHONE_NUMBER: str
     MAX_SMS_ATTEMPTS: int = 3
+    SMS_QUEUE_SIZE: int = 1000
+    SMS_WORKERS: int = 4
+    SMS_TRANSPORT: str = "twilio"  # twilio | fake
 
     model_config = SettingsConfigDict(
         env_file=".env", env_prefix="twilio_", extra="ignore"
@@ -129,6 +168,55 @@ class TwilioSettings(BaseSettings):
         return settings_as_string(self.model_dump(), "TWILIO")
 
 
+class ExpoSettings(BaseSettings):
+    """creates a singleton constants instance"""
+
+    # push retries, seconds
+    PUSH_RETRY_BASE_DELAY: float = 5
+    PUSH_RETRY_MAX_DELAY: float = 300
+    PUSH_RETRY_MAX_ATTEMPTS: int = 5
+    PUSH_RETRY_MAX_AGE: float = 3600
+
+    # notification outbox dispatcher
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1
+    OUTBOX_LEASE: float = 60
+
+    # per worker cache of notification preferences, seconds
+    PREFERENCE_CACHE_SIZE: int = 10_000
+    PREFERENCE_CACHE_TTL: float = 60
+
+    # promotion campaigns, users per chunk and per read, messages/s,
+    # seconds a claimed campaign stays with its sender without a checkpoint
+    CAMPAIGN_CHUNK_SIZE: int = 1000
+    CAMPAIGN_PARTITION_SIZE: int = 50_000
+    CAMPAIGN_RATE_LIMIT: float = 500
+    CAMPAIGN_LEASE: float = 300
+
+    # per worker cache of unread badge counts, seconds
+    UNREAD_CACHE_SIZE: int = 10_000
+    UNREAD_CACHE_TTL: float = 5
+
+    # write-behind buffer of bulk notification records, rows and seconds
+    NOTIFICATION_WRITER_MAX_ROWS: int = 1000
+    NOTIFICATION_WRITER_FLUSH_INTERVAL: float = 2
+
+    # push receipt checks, seconds; receipts are ready about 15 minutes after
+    # the send and kept by expo for a day
+    RECEIPT_DELAY: float = 900
+    RECEIPT_POLL_INTERVAL: float = 60
+    RECEIPT_BATCH_SIZE: int = 1000
+    RECEIPT_LEASE: float = 300
+    RECEIPT_MAX_AGE: float = 86400
+
+    model_config = SettingsConfigDict(
+        env_file=".env", env_prefix="expo_", extra="ignore"
+    )
+
+    def __str__(self):
+        return settings_as_string(self.model_dump(), "EXPO")
+
+
 class Settings(BaseSettings):
     """creates a singleton constants instance"""
 
@@ -139,6 +227,7 @@ class Settings(BaseSettings):
     JT: TokenSettings = TokenSettings()
     PAYUP: PayupSettings = PayupSettings()
     ATTESTR: AttestrSettings = AttestrSettings()
+    EXPO: ExpoSettings = ExpoSettings()
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
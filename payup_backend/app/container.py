@@ -0,0 +1,229 @@
+"""process wide wiring of the sessionmaker, repositories, external clients and services"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .config.constants import get_settings
+from .cockroach_sql.database import database
+from .cockroach_sql.dao.device_dao import DeviceRepo
+from .cockroach_sql.dao.device_token_dao import DeviceTokenRepo
+from .cockroach_sql.dao.kyc_dao import KycEntityRepo
+from .cockroach_sql.dao.kyc_lookup_dao import KycLookupRepo
+from .cockroach_sql.dao.kyc_user_dao import UserKycRelationRepo
+from .cockroach_sql.dao.notification_dao import (
+    NotificationCounterRepository,
+    NotificationOutboxRepository,
+    NotificationPreferenceRepository,
+    NotificationRepository,
+)
+from .cockroach_sql.dao.otp_dao import OTPRepo
+from .cockroach_sql.dao.payee_dao import PayeeRepository
+from .cockroach_sql.dao.profile_dao import ProfileRepo
+from .cockroach_sql.dao.promotion_dao import PromotionCampaignRepo, PromotionRepo
+from .cockroach_sql.dao.push_receipt_dao import PushReceiptRepo
+from .cockroach_sql.dao.tokens_dao import RefreshTokenRepo, AccessTokenBlacklistRepo
+from .cockroach_sql.dao.user_dao import UserRepo
+from .dependency.campaign_sender import CampaignSender
+from .dependency.expo_notification import ExpoNotification
+from .dependency.notification_dispatcher import NotificationDispatcher
+from .dependency.notification_writer import NotificationWriter
+from .dependency.payee_cache import PayeeListCache
+from .dependency.preference_cache import PreferenceCache
+from .dependency.push_receipts import PushReceiptPoller
+from .dependency.token_blacklist import access_token_blacklist
+from .dependency.unread_cache import UnreadCountCache
+from .helperClass.singleflight import SingleFlight
+from .helperClass.verifications.kyc_pan.attestr.attestr import Attestr
+from .helperClass.verifications.kyc_pan.sandbox.sandbox import Sandbox
+from .helperClass.verifications.kyc_pan.verification_cache import VerificationCache
+from .helperClass.verifications.phone.sms_queue import (
+    SmsDispatcher,
+    build_sms_transport,
+)
+from .helperClass.verifications.phone.twilio import TwilioService
+from .modules.auth.service import AuthService
+from .modules.device.service import DeviceService
+from .modules.device_token.service import DeviceTokenService
+from .modules.easebuzz.service import EasebuzzService
+from .modules.item.service import ItemService
+from .modules.kyc.service import KycService
+from .modules.notification.service import NotificationService
+from .modules.payee.service import PayeeService
+from .modules.profile.service import ProfileService
+from .modules.promotion.service import PromotionService
+from .modules.token.service import TokenService
+from .modules.user.service import UserService
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+
+class Container:
+    """
+    Builds one instance of every repository, external client and service per worker.
+
+    Everything shares a single sessionmaker. Pass a different one to wire the
+    services against another database, e.g. in tests.
+    """
+
+    def __init__(self, sessionmaker: Optional[async_sessionmaker] = None):
+        self.sessionmaker = sessionmaker or database.get_session()
+
+        # repositories
+        self.user_repo = UserRepo()
+        self.profile_repo = ProfileRepo()
+        self.otp_repo = OTPRepo()
+        self.refresh_token_repo = RefreshTokenRepo()
+        self.access_token_repo = AccessTokenBlacklistRepo()
+        self.device_repo = DeviceRepo()
+        self.device_token_repo = DeviceTokenRepo()
+        self.kyc_repo = KycEntityRepo()
+        self.kyc_lookup_repo = KycLookupRepo()
+        self.kyc_relation_repo = UserKycRelationRepo()
+        self.notification_repo = NotificationRepository()
+        self.notification_outbox_repo = NotificationOutboxRepository()
+        self.notification_counter_repo = NotificationCounterRepository()
+        self.notification_pref_repo = NotificationPreferenceRepository()
+        self.payee_repo = PayeeRepository()
+        self.promotion_repo = PromotionRepo()
+        self.promotion_campaign_repo = PromotionCampaignRepo()
+        self.push_receipt_repo = PushReceiptRepo()
+
+        # external clients
+        self.access_token_blacklist = access_token_blacklist
+        self.sms_dispatcher = SmsDispatcher(build_sms_transport())
+        self.twilio_client = TwilioService(sms_dispatcher=self.sms_dispatcher)
+        # one group for every vendor, keys are namespaced by provider
+        self.singleflight = SingleFlight()
+        self.sandbox_client = Sandbox(
+            constants.SANDBOX.API_KEY,
+            constants.SANDBOX.SECRET_KEY,
+            singleflight=self.singleflight,
+        )
+        self.attestr_client = Attestr(
+            sessionmaker=self.sessionmaker,
+            kyc_repo=self.kyc_repo,
+            lookup_repo=self.kyc_lookup_repo,
+            singleflight=self.singleflight,
+        )
+        self.verification_cache = VerificationCache()
+        self.payee_cache = PayeeListCache()
+        self.expo_client = ExpoNotification(
+            token_repo=self.device_token_repo, receipt_repo=self.push_receipt_repo
+        )
+        self.preference_cache = PreferenceCache()
+        self.unread_cache = UnreadCountCache()
+        # started by the notification worker, not by the api workers
+        self.notification_dispatcher = NotificationDispatcher(
+            sessionmaker=self.sessionmaker,
+            expo_notification=self.expo_client,
+            outbox_repo=self.notification_outbox_repo,
+            notification_repo=self.notification_repo,
+            token_repo=self.device_token_repo,
+        )
+        self.push_receipt_poller = PushReceiptPoller(
+            sessionmaker=self.sessionmaker,
+            expo_notification=self.expo_client,
+            receipt_repo=self.push_receipt_repo,
+            token_repo=self.device_token_repo,
+        )
+        # run by the campaign worker
+        self.notification_writer = NotificationWriter(
+            sessionmaker=self.sessionmaker,
+            notification_repo=self.notification_repo,
+            counter_repo=self.notification_counter_repo,
+        )
+        self.campaign_sender = CampaignSender(
+            sessionmaker=self.sessionmaker,
+            expo_notification=self.expo_client,
+            promotion_repo=self.promotion_repo,
+            campaign_repo=self.promotion_campaign_repo,
+            preference_repo=self.notification_pref_repo,
+            token_repo=self.device_token_repo,
+            notification_writer=self.notification_writer,
+        )
+
+        # services
+        self.user_service = UserService(
+            sessionmaker=self.sessionmaker, user_repo=self.user_repo
+        )
+        self.profile_service = ProfileService(
+            sessionmaker=self.sessionmaker, profile_repo=self.profile_repo
+        )
+        self.auth_service = AuthService(
+            sessionmaker=self.sessionmaker,
+            user_repo=self.user_repo,
+            profile_repo=self.profile_repo,
+            otp_repo=self.otp_repo,
+            notification_pref_repo=self.notification_pref_repo,
+            twilio_service=self.twilio_client,
+            user_service=self.user_service,
+        )
+        self.token_service = TokenService(
+            sessionmaker=self.sessionmaker,
+            refresh_token_repo=self.refresh_token_repo,
+            access_token_repo=self.access_token_repo,
+            user_repo=self.user_repo,
+            blacklist_cache=self.access_token_blacklist,
+        )
+        self.device_service = DeviceService(
+            sessionmaker=self.sessionmaker, device_repo=self.device_repo
+        )
+        self.device_token_service = DeviceTokenService(
+            sessionmaker=self.sessionmaker, device_token_repo=self.device_token_repo
+        )
+        self.kyc_service = KycService(
+            sessionmaker=self.sessionmaker,
+            kyc_repo=self.kyc_repo,
+            lookup_repo=self.kyc_lookup_repo,
+            relational_repo=self.kyc_relation_repo,
+            profile_repo=self.profile_repo,
+            user_repo=self.user_repo,
+            sandbox_client=self.sandbox_client,
+            attestr_client=self.attestr_client,
+            verification_cache=self.verification_cache,
+        )
+        self.payee_service = PayeeService(
+            sessionmaker=self.sessionmaker,
+            payee_repo=self.payee_repo,
+            profile_service=self.profile_service,
+            kyc_service=self.kyc_service,
+            attestr_client=self.attestr_client,
+            payee_cache=self.payee_cache,
+        )
+        self.notification_service = NotificationService(
+            sessionmaker=self.sessionmaker,
+            preference_repo=self.notification_pref_repo,
+            notification_repo=self.notification_repo,
+            outbox_repo=self.notification_outbox_repo,
+            counter_repo=self.notification_counter_repo,
+            preference_cache=self.preference_cache,
+            unread_cache=self.unread_cache,
+        )
+        self.promotion_service = PromotionService(
+            sessionmaker=self.sessionmaker, promotion_repo=self.promotion_repo
+        )
+        self.easebuzz_service = EasebuzzService(
+            sessionmaker=self.sessionmaker, profile_repo=self.profile_repo
+        )
+        self.item_service = ItemService()
+
+    async def startup(self):
+        """start per worker background state, called from the app lifespan"""
+        await self.access_token_blacklist.start()
+        await self.sms_dispatcher.start()
+        await self.sandbox_client.start()
+
+    async def shutdown(self):
+        """stop background state and release clients, called from the app lifespan"""
+        await self.sms_dispatcher.stop()
+        await self.access_token_blacklist.stop()
+        await self.sandbox_client.aclose()
+        await self.attestr_client.aclose()
+        await self.expo_client.aclose()
+
+
+container = Container()
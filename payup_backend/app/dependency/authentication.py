@@ -1,21 +1,22 @@
+import hashlib
 import logging
+import time
+from functools import lru_cache
 from typing import Any, Dict
 import jwt
 
+from cachetools import TLRUCache
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 
 from payup_backend.app.modules import user
+from .token_blacklist import access_token_blacklist
+from ..config.constants import get_settings
 
 logger = logging.getLogger(__name__)
-# Assuming you have similar configurations as in the Go code
-SECRET_KEY = "your_jwt_secret_key"
-ALGORITHM = "HS256"
-ISSUER = "auth@payup.turtlebyte"
-AUDIENCE = ["client@payup.turtlebyte", "localhost"]
-ACCESS_TOKEN_DURATION = 10 * 24 * 60  # in minutes
-REFRESH_TOKEN_DURATION = 30 * 24 * 60  # in minutes
+
+constants = get_settings()
 
 signin_oauth2_schema = OAuth2PasswordBearer(
     tokenUrl="api/auth/signin",
@@ -56,8 +57,51 @@ class JwtTokenResponse(BaseModel):
     refresh_token: str
 
 
+class JwtDecoder:
+    """PyJWT decoder with key, algorithms, issuer and audience bound once"""
+
+    def __init__(self, secret_key: str, algorithm: str, issuer: str, audience: Any):
+        self._jwt = jwt.PyJWT(options={"require": ["exp", "iss", "aud"]})
+        self._secret_key = secret_key
+        self._algorithms = [algorithm]
+        self._issuer = issuer
+        self._audience = audience
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        return self._jwt.decode(
+            token,
+            self._secret_key,
+            algorithms=self._algorithms,
+            issuer=self._issuer,
+            audience=self._audience,
+        )
+
+
+@lru_cache
+def get_jwt_decoder() -> JwtDecoder:
+    """one decoder per process, built from get_settings().JT"""
+    return JwtDecoder(
+        secret_key=constants.JT.SECRET_KEY,
+        algorithm=constants.JT.ALGORITHM,
+        issuer=constants.JT.ISSUER,
+        audience=constants.JT.AUDIENCE,
+    )
+
+
+# validated claims keyed by sha256 of the token string, held until the token's exp
+_decoded_tokens = TLRUCache(
+    maxsize=constants.JT.DECODE_CACHE_SIZE,
+    ttu=lambda _key, claims, _now: claims["exp"],
+    timer=time.time,
+)
+
+
 class JWTAuth:
-    def __init__(self, algorithm: str = ALGORITHM, secret_key: str = SECRET_KEY):
+    def __init__(
+        self,
+        algorithm: str = constants.JT.ALGORITHM,
+        secret_key: str = constants.JT.SECRET_KEY,
+    ):
         self.algorithm = algorithm
         self.secret_key = secret_key
 
@@ -67,23 +111,13 @@ class JWTAuth:
 
     @classmethod
     def decode(cls, token: str) -> Dict[str, Any]:
+        cache_key = hashlib.sha256(token.encode()).digest()
+        decoded = _decoded_tokens.get(cache_key)
+        if decoded is not None:
+            return decoded
         try:
-            decoded = jwt.decode(
-                token,
-                SECRET_KEY,
-                algorithms=[ALGORITHM],
-                issuer=ISSUER,
-                audience=AUDIENCE,
-            )
-            print(f"Decoded JWT: {decoded}")
-
-            # Manually check the 'sub' claim
-            # if decoded.get("sub") != expected_subject:
-            #     raise jwt.InvalidTokenError(
-            #         "The subject claim does not match the expected value."
-            #     )
-
-            print("JWT is valid. Issuer, Audience, and Subject are verified.")
+            decoded = get_jwt_decoder().decode(token)
+            _decoded_tokens[cache_key] = decoded
             return decoded
         except jwt.ExpiredSignatureError as exc:
             logger.error("error: %s", exc.args)
@@ -114,8 +148,14 @@ class JWTAuth:
         return self.encode(claims.model_dump())
 
     @classmethod
-    def get_current_user(cls, token: str = Depends(signin_oauth2_schema)):
+    async def get_current_user(cls, token: str = Depends(signin_oauth2_schema)):
         token_dict = cls.decode(token)
+        jti = token_dict.get("jti")
+        if jti is not None and await access_token_blacklist.is_blacklisted(jti):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+            )
         p_id = token_dict.get("profile_id")
         u_id = token_dict.get("user_id")
         if p_id is not None and u_id is not None:
@@ -0,0 +1,263 @@
+"""push a promotion to every user who opted in to promotional notifications"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+import pytz
+from exponent_server_sdk import PushMessage, PushTicket
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .expo_notification import ExpoNotification
+from .notification_writer import NotificationWriter
+from ..cockroach_sql.dao.device_token_dao import DeviceTokenRepo
+from ..cockroach_sql.dao.notification_dao import NotificationPreferenceRepository
+from ..cockroach_sql.dao.promotion_dao import PromotionCampaignRepo, PromotionRepo
+from ..cockroach_sql.transaction import run_transaction
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+from ..helperClass.rate_limit import TokenBucket
+from ..modules.notification.model import (
+    NotificationFlag,
+    NotificationModel,
+    NotificationStatus,
+)
+from ..modules.promotion.model import PromotionCampaign
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+
+class CampaignSender:
+    """
+    Sends promotion campaigns chunk by chunk.
+
+    Eligible users are read in user_id order, `partition_size` at a time,
+    and each read finishes before any of its users is sent to, so no read
+    transaction is held open across expo calls or rate limit waits. Every
+    chunk of `chunk_size` users gets its tokens in one join and goes out in
+    expo sized requests paced by a token bucket shared by all campaigns of
+    the process. A sender claims a campaign for `lease` seconds before
+    sending it, so concurrent workers never send the same campaign. After a
+    chunk is sent the campaign row checkpoints its last user id and extends
+    the lease, a campaign whose sender died is claimed again once the lease
+    lapses and resumes after the checkpoint, resending at most the chunk that
+    was in flight. Inbox records of the recipients go through the
+    write-behind NotificationWriter.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        expo_notification: ExpoNotification,
+        promotion_repo: PromotionRepo,
+        campaign_repo: PromotionCampaignRepo,
+        preference_repo: NotificationPreferenceRepository,
+        token_repo: DeviceTokenRepo,
+        notification_writer: NotificationWriter,
+        chunk_size: int = constants.EXPO.CAMPAIGN_CHUNK_SIZE,
+        partition_size: int = constants.EXPO.CAMPAIGN_PARTITION_SIZE,
+        rate_limit: float = constants.EXPO.CAMPAIGN_RATE_LIMIT,
+        lease: float = constants.EXPO.CAMPAIGN_LEASE,
+    ):
+        self.sessionmaker = sessionmaker
+        self.expo_notification = expo_notification
+        self.promotion_repo = promotion_repo
+        self.campaign_repo = campaign_repo
+        self.preference_repo = preference_repo
+        self.token_repo = token_repo
+        self.notification_writer = notification_writer
+        self.chunk_size = chunk_size
+        self.partition_size = max(partition_size, chunk_size)
+        self.lease = lease
+        # room for at least one full expo request
+        self.rate_limiter = TokenBucket(
+            rate=rate_limit,
+            capacity=max(rate_limit, expo_notification.max_message_count),
+        )
+
+    async def create_campaign(self, promotion_id: int) -> PromotionCampaign:
+        """start a campaign for a promotion, sent by the next `run_pending`"""
+
+        async def _create(session: AsyncSession):
+            promotion = await self.promotion_repo.get_promotion_by_id(
+                session=session, promotion_id=promotion_id
+            )
+            if promotion is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Promotion {promotion_id} not found",
+                )
+            return await self.campaign_repo.create_campaign(
+                session=session,
+                campaign=PromotionCampaign(
+                    promotion_id=promotion.id,
+                    title=promotion.title,
+                    message=promotion.description,
+                ),
+            )
+
+        return await run_transaction(self.sessionmaker, _create)
+
+    async def run_pending(self):
+        """claim and send running campaigns, oldest first, until none is left"""
+        while True:
+            campaign = await run_transaction(
+                self.sessionmaker,
+                lambda session: self.campaign_repo.claim_campaign(
+                    session=session, lease=self.lease
+                ),
+            )
+            if campaign is None:
+                return
+            await self.run(campaign)
+
+    async def run(self, campaign: PromotionCampaign):
+        """send a campaign claimed by `run_pending`"""
+        logger.info(
+            "campaign %s for promotion %s starting after user %s",
+            campaign.campaign_id,
+            campaign.promotion_id,
+            campaign.last_user_id,
+        )
+        after = campaign.last_user_id
+        while True:
+            streamed, after, claimed = await self._send_partition(campaign, after)
+            if not claimed:
+                logger.warning(
+                    "campaign %s was taken over by another sender",
+                    campaign.campaign_id,
+                )
+                return
+            if streamed < self.partition_size:
+                break
+
+        await run_transaction(
+            self.sessionmaker,
+            lambda session: self.campaign_repo.complete_campaign(
+                session=session, campaign_id=campaign.campaign_id
+            ),
+        )
+        logger.info("campaign %s completed", campaign.campaign_id)
+
+    async def _send_partition(
+        self, campaign: PromotionCampaign, after: Optional[UUID]
+    ) -> Tuple[int, Optional[UUID], bool]:
+        """
+        read up to `partition_size` users after `after`, then send them chunk
+        by chunk. Returns the users read, the new checkpoint and whether the
+        campaign is still claimed by this sender.
+        """
+        async with self.sessionmaker() as session:
+            user_ids = [
+                user_id
+                async for user_id in self.preference_repo.stream_user_ids(
+                    session=session,
+                    flags=NotificationFlag.PROMOTIONS,
+                    after=after,
+                    limit=self.partition_size,
+                    chunk_size=self.chunk_size,
+                )
+            ]
+            await session.commit()
+
+        for start in range(0, len(user_ids), self.chunk_size):
+            chunk = user_ids[start : start + self.chunk_size]
+            if not await self._send_chunk(campaign, chunk):
+                return len(user_ids), after, False
+            after = chunk[-1]
+        return len(user_ids), after, True
+
+    async def _send_chunk(
+        self, campaign: PromotionCampaign, user_ids: List[UUID]
+    ) -> bool:
+        """send one chunk, False once another sender owns the campaign"""
+        async with self.sessionmaker() as session:
+            tokens = await self.token_repo.get_push_tokens_for_users(
+                session=session, user_ids=user_ids
+            )
+
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        push_messages = [
+            PushMessage(
+                to=token,
+                title=campaign.title,
+                body=campaign.message,
+                data={"promotion_id": campaign.promotion_id},
+            )
+            for user_tokens in tokens.values()
+            for token in user_tokens
+        ]
+        size = self.expo_notification.max_message_count
+        results = await asyncio.gather(
+            *(
+                self._send_batch(push_messages[start : start + size])
+                for start in range(0, len(push_messages), size)
+            )
+        )
+        push_tickets = [ticket for tickets in results for ticket in tickets]
+        pushes_sent = sum(1 for ticket in push_tickets if ticket.is_success())
+
+        # one inbox record per user, sent if any of their devices got it
+        owners = {
+            token: user_id
+            for user_id, user_tokens in tokens.items()
+            for token in user_tokens
+        }
+        reached = {
+            owners[ticket.push_message.to]
+            for ticket in push_tickets
+            if ticket.is_success()
+        }
+        await self.notification_writer.add(
+            [
+                NotificationModel(
+                    user_id=user_id,
+                    title=campaign.title,
+                    message=campaign.message,
+                    type="promotions",
+                    method="app_notification",
+                    status=(
+                        NotificationStatus.SENT.value
+                        if user_id in reached
+                        else NotificationStatus.FAILED.value
+                    ),
+                    created_at=current_time,
+                    updated_at=current_time,
+                )
+                for user_id in tokens
+            ]
+        )
+
+        async def _checkpoint(session: AsyncSession):
+            await self.expo_notification.record_tickets(
+                session=session, push_tickets=push_tickets
+            )
+            return await self.campaign_repo.save_checkpoint(
+                session=session,
+                campaign_id=campaign.campaign_id,
+                last_user_id=user_ids[-1],
+                users_notified=len(tokens),
+                pushes_sent=pushes_sent,
+                lease=self.lease,
+            )
+
+        claimed = await run_transaction(self.sessionmaker, _checkpoint)
+        metrics.inc("campaign.users", len(user_ids))
+        metrics.inc("campaign.pushes_sent", pushes_sent)
+        metrics.inc("campaign.pushes_failed", len(push_messages) - pushes_sent)
+        return claimed
+
+    async def _send_batch(self, push_messages: List[PushMessage]) -> List[PushTicket]:
+        """one expo request once the rate limit allows it, failures are dropped"""
+        await self.rate_limiter.acquire(len(push_messages))
+        try:
+            return await self.expo_notification.send_push_messages(push_messages)
+        except Exception as err:
+            # promotions are best effort, the campaign moves on
+            logger.error("campaign batch of %s failed : %s", len(push_messages), err)
+            return []
@@ -1,65 +1,296 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+import pytz
 import rollbar
 from exponent_server_sdk import (
     DeviceNotRegisteredError,
     PushClient,
     PushMessage,
     PushServerError,
+    PushTicket,
     PushTicketError,
 )
-from requests.exceptions import ConnectionError, HTTPError
-from tenacity import retry, stop_after_attempt, wait_fixed
+from sqlalchemy.ext.asyncio import AsyncSession
 from payup_backend.app.cockroach_sql.dao.device_token_dao import DeviceTokenRepo
+from payup_backend.app.cockroach_sql.dao.push_receipt_dao import PushReceiptRepo
+from payup_backend.app.config.constants import get_settings
+from payup_backend.app.modules.notification.model import PushReceiptModel
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+EXPO_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
+
+
+def build_expo_client() -> httpx.AsyncClient:
+    """keep-alive client shared by every push request of the worker"""
+    return httpx.AsyncClient(
+        headers={
+            "accept": "application/json",
+            "accept-encoding": "gzip, deflate",
+            "content-type": "application/json",
+        },
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        timeout=httpx.Timeout(20, connect=5),
+    )
 
 
 class ExpoNotification:
-    def __init__(self):
-        self.push_client = PushClient()
-        self.token_repo = DeviceTokenRepo()
+    def __init__(
+        self,
+        token_repo: DeviceTokenRepo,
+        receipt_repo: Optional[PushReceiptRepo] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        max_message_count: int = PushClient.DEFAULT_MAX_MESSAGE_COUNT,
+        max_receipt_count: int = PushClient.DEFAULT_MAX_RECEIPT_COUNT,
+        receipt_delay: float = constants.EXPO.RECEIPT_DELAY,
+    ):
+        self.token_repo = token_repo
+        self.receipt_repo = receipt_repo
+        self.client = client or build_expo_client()
+        self.max_message_count = max_message_count
+        self.max_receipt_count = max_receipt_count
+        self.receipt_delay = receipt_delay
+
+    async def aclose(self):
+        """close pooled connections, called on app shutdown"""
+        await self.client.aclose()
+
+    async def _publish_chunk(
+        self, push_messages: List[PushMessage]
+    ) -> List[PushTicket]:
+        """one expo push request, the response is parsed like PushClient does"""
+        response = await self.client.post(
+            EXPO_PUSH_URL, json=[pm.get_payload() for pm in push_messages]
+        )
 
-    # Retry decorator with tenacity
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
-    async def send_push_message(self, token, message, extra=None, session=None):
         try:
-            response = PushClient().publish(
-                PushMessage(to=token, body=message, data=extra)
+            response_data = response.json()
+        except ValueError:
+            response.raise_for_status()
+            raise PushServerError("Invalid server response", response)
+
+        if "errors" in response_data:
+            raise PushServerError(
+                "Request failed",
+                response,
+                response_data=response_data,
+                errors=response_data["errors"],
             )
+        if "data" not in response_data:
+            raise PushServerError(
+                "Invalid server response", response, response_data=response_data
+            )
+        response.raise_for_status()
+
+        if len(push_messages) != len(response_data["data"]):
+            raise PushServerError(
+                f"Mismatched response length. Expected {len(push_messages)} "
+                f"tickets but only received {len(response_data['data'])}",
+                response,
+                response_data=response_data,
+            )
+
+        return [
+            PushTicket(
+                push_message=push_message,
+                # If there is no status, assume error.
+                status=push_ticket.get("status", PushTicket.ERROR_STATUS),
+                message=push_ticket.get("message", ""),
+                details=push_ticket.get("details", None),
+                id=push_ticket.get("id", ""),
+            )
+            for push_message, push_ticket in zip(push_messages, response_data["data"])
+        ]
+
+    async def publish_multiple(
+        self, push_messages: List[PushMessage]
+    ) -> List[PushTicket]:
+        """
+        Send messages in chunks of at most `max_message_count` per request,
+        chunks go out concurrently over the pooled client. Messages whose `to`
+        is not an expo push token are dropped before sending.
+        """
+        valid_messages = []
+        for push_message in push_messages:
+            if PushClient.is_exponent_push_token(push_message.to):
+                valid_messages.append(push_message)
+            else:
+                logger.warning("skipping invalid push token %s", push_message.to)
+
+        chunks = [
+            valid_messages[start : start + self.max_message_count]
+            for start in range(0, len(valid_messages), self.max_message_count)
+        ]
+        results = await asyncio.gather(
+            *(self._publish_chunk(chunk) for chunk in chunks)
+        )
+        return [ticket for tickets in results for ticket in tickets]
+
+    async def send_push_messages(
+        self, push_messages: List[PushMessage]
+    ) -> List[PushTicket]:
+        """
+        Publish a batch and validate every ticket on its own. A failed ticket is
+        reported and logged without affecting the rest of the batch, callers
+        inspect `ticket.is_success()`.
+        """
+        try:
+            push_tickets = await self.publish_multiple(push_messages)
         except PushServerError as exc:
             # Encountered some likely formatting/validation error.
             rollbar.report_exc_info(
                 extra_data={
-                    "token": token,
-                    "message": message,
-                    "extra": extra,
+                    "messages": len(push_messages),
                     "errors": exc.errors,
                     "response_data": exc.response_data,
                 }
             )
             raise
-        except (ConnectionError, HTTPError) as exc:
-            # Encountered some Connection or HTTP error - retry a few times in
-            # case it is transient.
-            rollbar.report_exc_info(
-                extra_data={"token": token, "message": message, "extra": extra}
-            )
-            raise exc
+        except httpx.HTTPError:
+            # Connection or HTTP error, failed pushes are retried by the caller
+            rollbar.report_exc_info(extra_data={"messages": len(push_messages)})
+            raise
+
+        for push_ticket in push_tickets:
+            try:
+                push_ticket.validate_response()
+            except DeviceNotRegisteredError:
+                logger.info("device not registered: %s", push_ticket.push_message.to)
+            except PushTicketError as exc:
+                # Encountered some other per-notification error.
+                logger.error("push to %s failed : %s", push_ticket.push_message.to, exc)
+                rollbar.report_exc_info(
+                    extra_data={
+                        "token": push_ticket.push_message.to,
+                        "push_response": exc.push_response._asdict(),
+                    }
+                )
+        return push_tickets
+
+    @staticmethod
+    def retryable_messages(push_tickets: List[PushTicket]) -> List[PushMessage]:
+        """
+        messages worth sending again: failed tickets other than unregistered
+        devices and oversized payloads, which would fail the same way
+        """
+        permanent = (
+            PushTicket.ERROR_DEVICE_NOT_REGISTERED,
+            PushTicket.ERROR_MESSAGE_TOO_BIG,
+        )
+        return [
+            push_ticket.push_message
+            for push_ticket in push_tickets
+            if not push_ticket.is_success()
+            and (push_ticket.details or {}).get("error") not in permanent
+        ]
+
+    @staticmethod
+    def unregistered_tokens(push_tickets: Sequence[PushTicket]) -> List[str]:
+        """tokens of tickets or receipts that failed with DeviceNotRegistered"""
+        return [
+            push_ticket.push_message.to
+            for push_ticket in push_tickets
+            if (push_ticket.details or {}).get("error")
+            == PushTicket.ERROR_DEVICE_NOT_REGISTERED
+        ]
+
+    async def remove_unregistered(
+        self, session: AsyncSession, push_tickets: List[PushTicket]
+    ):
+        """delete tokens expo reported as DeviceNotRegistered, in one statement"""
+        await self.token_repo.delete_device_tokens(
+            session=session, tokens=self.unregistered_tokens(push_tickets)
+        )
+
+    async def record_tickets(
+        self, session: AsyncSession, push_tickets: List[PushTicket]
+    ):
+        """
+        Settle a sent batch in the caller's transaction: unregistered tokens are
+        deleted now, accepted tickets are queued for the receipt poller, which
+        finds devices expo only learns about after delivery.
+        """
+        await self.remove_unregistered(session=session, push_tickets=push_tickets)
+        if self.receipt_repo is None:
+            return
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        check_after = current_time + timedelta(seconds=self.receipt_delay)
+        await self.receipt_repo.add_receipts(
+            session=session,
+            receipts=[
+                PushReceiptModel(
+                    ticket_id=push_ticket.id,
+                    token=push_ticket.push_message.to,
+                    check_after=check_after,
+                    created_at=current_time,
+                )
+                for push_ticket in push_tickets
+                if push_ticket.is_success() and push_ticket.id
+            ],
+        )
+
+    async def _get_receipts_chunk(self, ticket_ids: List[str]) -> List[PushTicket]:
+        response = await self.client.post(EXPO_RECEIPTS_URL, json={"ids": ticket_ids})
 
         try:
-            # We got a response back, but we don't know whether it's an error yet.
-            # This call raises errors, so we can handle them with normal exception
-            # flows.
-            response.validate_response()
-        except DeviceNotRegisteredError:
-            # Delete the token
-            await self.token_repo.delete_device_token(token=token, session=session)
-            raise HTTPError("Device not registered")
-        except PushTicketError as exc:
-            # Encountered some other per-notification error.
-            rollbar.report_exc_info(
-                extra_data={
-                    "token": token,
-                    "message": message,
-                    "extra": extra,
-                    "push_response": exc.push_response._asdict(),
-                }
+            response_data = response.json()
+        except ValueError:
+            response.raise_for_status()
+            raise PushServerError("Invalid server response", response)
+
+        if "errors" in response_data:
+            raise PushServerError(
+                "Request failed",
+                response,
+                response_data=response_data,
+                errors=response_data["errors"],
             )
-            raise exc
+        if "data" not in response_data:
+            raise PushServerError(
+                "Invalid server response", response, response_data=response_data
+            )
+        response.raise_for_status()
+
+        return [
+            PushTicket(
+                push_message=PushMessage(to=None),
+                status=receipt.get("status", PushTicket.ERROR_STATUS),
+                message=receipt.get("message", ""),
+                details=receipt.get("details", None),
+                id=ticket_id,
+            )
+            for ticket_id, receipt in response_data["data"].items()
+        ]
+
+    async def get_receipts(self, ticket_ids: Sequence[str]) -> Dict[str, PushTicket]:
+        """
+        Receipts expo has ready for `ticket_ids`, keyed by ticket id, fetched in
+        concurrent requests of at most `max_receipt_count` ids. Tickets whose
+        receipt is not ready yet are missing from the result.
+        """
+        chunks = [
+            list(ticket_ids[start : start + self.max_receipt_count])
+            for start in range(0, len(ticket_ids), self.max_receipt_count)
+        ]
+        results = await asyncio.gather(
+            *(self._get_receipts_chunk(chunk) for chunk in chunks)
+        )
+        return {receipt.id: receipt for receipts in results for receipt in receipts}
+
+    async def send_push_message(self, token, message, extra=None, session=None):
+        """send a single message, raises if its ticket is not ok"""
+        push_tickets = await self.send_push_messages(
+            [PushMessage(to=token, body=message, data=extra)]
+        )
+        if session is not None:
+            await self.remove_unregistered(session, push_tickets)
+        for push_ticket in push_tickets:
+            push_ticket.validate_response()
+        return push_tickets
@@ -0,0 +1,192 @@
+"""delivery of queued push notifications from the notification outbox"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+
+import pytz
+from exponent_server_sdk import PushMessage
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .expo_notification import ExpoNotification
+from .push_retry import RetryPolicy
+from ..cockroach_sql.dao.device_token_dao import DeviceTokenRepo
+from ..cockroach_sql.dao.notification_dao import (
+    NotificationOutboxRepository,
+    NotificationRepository,
+)
+from ..cockroach_sql.transaction import run_transaction
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+from ..modules.notification.model import NotificationOutboxModel, NotificationStatus
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+
+class NotificationDispatcher:
+    """
+    Drains notification_outbox through expo.
+
+    Every round claims a batch of due rows with FOR UPDATE SKIP LOCKED, so any
+    number of dispatcher processes can share the table. Their pushes go out in
+    one batched expo call outside of any transaction, then each row is settled:
+    delivered or abandoned rows are deleted, rows with retryable failures are
+    made due again per the retry policy with just the tokens still owed. The
+    outcome is recorded on the notification row.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        expo_notification: ExpoNotification,
+        outbox_repo: NotificationOutboxRepository,
+        notification_repo: NotificationRepository,
+        token_repo: DeviceTokenRepo,
+        policy: Optional[RetryPolicy] = None,
+        batch_size: int = constants.EXPO.OUTBOX_BATCH_SIZE,
+        poll_interval: float = constants.EXPO.OUTBOX_POLL_INTERVAL,
+        lease: float = constants.EXPO.OUTBOX_LEASE,
+    ):
+        self.sessionmaker = sessionmaker
+        self.expo_notification = expo_notification
+        self.outbox_repo = outbox_repo
+        self.notification_repo = notification_repo
+        self.token_repo = token_repo
+        self.policy = policy or RetryPolicy()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stopping(self) -> asyncio.Event:
+        # created on first use so it binds to the running loop
+        if self._stopping is None:
+            self._stopping = asyncio.Event()
+        return self._stopping
+
+    async def start(self):
+        if self._task is None:
+            self.stopping.clear()
+            self._task = asyncio.create_task(self.run(), name="notification-dispatcher")
+
+    async def stop(self):
+        """let the batch in flight settle, then return"""
+        if self._task is not None:
+            self.stopping.set()
+            await self._task
+            self._task = None
+
+    async def run(self):
+        while not self.stopping.is_set():
+            try:
+                dispatched = await self.dispatch_once()
+            except Exception as err:
+                logger.error("notification dispatch failed : %s", err)
+                dispatched = 0
+            # a full batch means more rows are likely due, go again at once
+            if dispatched < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self.stopping.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_once(self) -> int:
+        """deliver one batch of due rows, returns how many were claimed"""
+
+        async def _claim(session: AsyncSession):
+            rows = await self.outbox_repo.claim_batch(
+                session=session, limit=self.batch_size, lease=self.lease
+            )
+            user_ids = list({row.user_id for row in rows if row.push_tokens is None})
+            tokens = await self.token_repo.get_push_tokens_for_users(
+                session=session, user_ids=user_ids
+            )
+            return rows, tokens
+
+        rows, tokens = await run_transaction(self.sessionmaker, _claim)
+        if not rows:
+            return 0
+        metrics.inc("notification.outbox.claimed", len(rows))
+
+        messages: Dict[UUID, List[PushMessage]] = {}
+        for row in rows:
+            row_tokens = row.push_tokens
+            if row_tokens is None:
+                row_tokens = tokens.get(row.user_id, [])
+            messages[row.outbox_id] = [
+                PushMessage(to=token, body=row.message, data={"title": row.title})
+                for token in row_tokens
+            ]
+
+        batch = [message for row in rows for message in messages[row.outbox_id]]
+        push_tickets = []
+        pending_by_row = dict(messages)
+        if batch:
+            try:
+                push_tickets = await self.expo_notification.send_push_messages(batch)
+            except Exception as err:
+                # nothing of the batch is known to be delivered
+                logger.error("push batch of %s messages failed : %s", len(batch), err)
+            else:
+                tickets = {id(ticket.push_message): ticket for ticket in push_tickets}
+                pending_by_row = {
+                    outbox_id: self.expo_notification.retryable_messages(
+                        [tickets[id(m)] for m in row_messages if id(m) in tickets]
+                    )
+                    for outbox_id, row_messages in messages.items()
+                }
+
+        statuses = await run_transaction(
+            self.sessionmaker,
+            lambda session: self._settle(session, rows, pending_by_row, push_tickets),
+        )
+        for status in statuses:
+            metrics.inc(f"notification.outbox.{status.value}")
+        return len(rows)
+
+    async def _settle(
+        self,
+        session: AsyncSession,
+        rows: List[NotificationOutboxModel],
+        pending_by_row: Dict[UUID, List[PushMessage]],
+        push_tickets: list,
+    ) -> List[NotificationStatus]:
+        await self.expo_notification.record_tickets(
+            session=session, push_tickets=push_tickets
+        )
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        settled, statuses = [], []
+        for row in rows:
+            pending = pending_by_row[row.outbox_id]
+            age = (current_time - (row.created_at or current_time)).total_seconds()
+            if not pending:
+                status = NotificationStatus.SENT
+                settled.append(row.outbox_id)
+            elif self.policy.should_retry(row.attempts, age):
+                status = NotificationStatus.RETRYING
+                await self.outbox_repo.reschedule(
+                    session=session,
+                    outbox_id=row.outbox_id,
+                    available_at=current_time
+                    + timedelta(seconds=self.policy.next_delay(row.attempts)),
+                    push_tokens=[message.to for message in pending],
+                )
+            else:
+                status = NotificationStatus.FAILED
+                settled.append(row.outbox_id)
+            statuses.append(status)
+            await self.notification_repo.update_status(
+                session=session,
+                notification_id=row.notification_id,
+                status=status.value,
+            )
+        await self.outbox_repo.delete_outbox(session=session, outbox_ids=settled)
+        return statuses
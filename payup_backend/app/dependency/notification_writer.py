@@ -0,0 +1,119 @@
+"""write-behind buffer for append-only notification records"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..cockroach_sql.dao.notification_dao import (
+    NotificationCounterRepository,
+    NotificationRepository,
+)
+from ..cockroach_sql.transaction import run_transaction
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+from ..modules.notification.model import NotificationModel
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+
+class NotificationWriter:
+    """
+    Collects notification rows and writes them in bulk.
+
+    A flush is one transaction holding a multi-row INSERT of the buffered rows
+    and a single upsert of the unread counters they add up to. It runs once
+    `max_rows` rows are buffered, by the caller of `add`, every
+    `flush_interval` seconds from a background task and once more on `stop`.
+
+    Only for rows nothing else depends on being committed, e.g. campaign
+    records. Rows buffered when the process dies are lost, notifications that
+    must be written with the event causing them go through
+    NotificationService.enqueue_push_notification instead.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        notification_repo: NotificationRepository,
+        counter_repo: NotificationCounterRepository,
+        max_rows: int = constants.EXPO.NOTIFICATION_WRITER_MAX_ROWS,
+        flush_interval: float = constants.EXPO.NOTIFICATION_WRITER_FLUSH_INTERVAL,
+    ):
+        self.sessionmaker = sessionmaker
+        self.notification_repo = notification_repo
+        self.counter_repo = counter_repo
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._buffer: List[NotificationModel] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # created on first use so it binds to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="notification-writer")
+            metrics.gauge("notification.writer.buffered", lambda: len(self._buffer))
+
+    async def stop(self):
+        """stop the timer and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def add(self, notifications: Sequence[NotificationModel]):
+        """buffer rows, flushing in the caller once the buffer is full"""
+        self._buffer.extend(notifications)
+        if len(self._buffer) >= self.max_rows:
+            await self.flush()
+
+    async def flush(self):
+        async with self.lock:
+            while self._buffer:
+                rows = self._buffer[: self.max_rows]
+                del self._buffer[: self.max_rows]
+                await self._write(rows)
+
+    async def _write(self, rows: List[NotificationModel]):
+        unread = Counter(row.user_id for row in rows)
+
+        async def _insert(session: AsyncSession):
+            await self.notification_repo.add_notifications(
+                session=session, notifications=rows
+            )
+            await self.counter_repo.add_unread(session=session, counts=unread)
+
+        try:
+            await run_transaction(self.sessionmaker, _insert)
+        except Exception as err:
+            metrics.inc("notification.writer.dropped", len(rows))
+            logger.error("dropped %s notification rows : %s", len(rows), err)
+            return
+        metrics.inc("notification.writer.rows", len(rows))
+        metrics.inc("notification.writer.flushes")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # stop waits for a flush in progress rather than cutting it off
+                await asyncio.shield(self.flush())
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.error("notification writer flush failed : %s", err)
@@ -0,0 +1,53 @@
+"""per worker cache of the first page of each user's payee list"""
+
+import time
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from cachetools import TTLCache
+
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+from ..modules.payee.model import PayeeModel
+
+constants = get_settings()
+
+PayeePage = Tuple[List[PayeeModel], Optional[str]]
+
+
+class PayeeListCache:
+    """
+    Cache of the page the payee screen opens on, with its next cursor.
+
+    Entries are dropped when this worker adds or deletes a payee of the user,
+    changes made through other workers show within `ttl`. A hit needs the same
+    page size the entry was read with.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = constants.PAYUP.PAYEE_CACHE_SIZE,
+        ttl: float = constants.PAYUP.PAYEE_CACHE_TTL,
+    ):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, timer=time.monotonic)
+
+    def get(self, user_id: UUID, limit: int) -> Optional[PayeePage]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != limit:
+            metrics.inc("payee_cache.misses")
+            return None
+        metrics.inc("payee_cache.hits")
+        _, payees, next_cursor = entry
+        return list(payees), next_cursor
+
+    def put(
+        self,
+        user_id: UUID,
+        limit: int,
+        payees: List[PayeeModel],
+        next_cursor: Optional[str],
+    ):
+        self._entries[user_id] = (limit, tuple(payees), next_cursor)
+
+    def invalidate(self, user_id: UUID):
+        self._entries.pop(user_id, None)
@@ -0,0 +1,45 @@
+"""per worker cache of notification preferences in front of NotificationPreferenceRepository"""
+
+import time
+from typing import Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+from ..modules.notification.model import NotificationPreferenceResponse
+
+constants = get_settings()
+
+
+class PreferenceCache:
+    """
+    Bounded TTL cache of each user's notification preferences.
+
+    Filled on read and overwritten by this worker's own updates. Updates made
+    through another worker are picked up once the entry expires, so `ttl`
+    bounds how long workers may disagree.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = constants.EXPO.PREFERENCE_CACHE_SIZE,
+        ttl: float = constants.EXPO.PREFERENCE_CACHE_TTL,
+    ):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, timer=time.monotonic)
+
+    def get(self, user_id: UUID) -> Optional[NotificationPreferenceResponse]:
+        value = self._entries.get(user_id)
+        if value is None:
+            metrics.inc("preference_cache.misses")
+            return None
+        metrics.inc("preference_cache.hits")
+        # callers are free to mutate what they get back
+        return value.model_copy(deep=True)
+
+    def put(self, user_id: UUID, preferences: NotificationPreferenceResponse):
+        self._entries[user_id] = preferences.model_copy(deep=True)
+
+    def invalidate(self, user_id: UUID):
+        self._entries.pop(user_id, None)
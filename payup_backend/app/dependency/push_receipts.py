@@ -0,0 +1,130 @@
+"""periodic check of expo push receipts for devices that are gone"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+import pytz
+from exponent_server_sdk import PushTicket
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .expo_notification import ExpoNotification
+from ..cockroach_sql.dao.device_token_dao import DeviceTokenRepo
+from ..cockroach_sql.dao.push_receipt_dao import PushReceiptRepo
+from ..cockroach_sql.transaction import run_transaction
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+
+class PushReceiptPoller:
+    """
+    Reads the receipts of recorded push tickets and deletes dead tokens.
+
+    Every `poll_interval` seconds due tickets are claimed in batches with
+    FOR UPDATE SKIP LOCKED and their receipts fetched in bulk. Tokens whose
+    receipt failed with DeviceNotRegistered are deleted with one statement
+    per batch. Tickets with a receipt, and tickets older than `max_age` that
+    never got one, are forgotten; the rest come back after the claim lease.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        expo_notification: ExpoNotification,
+        receipt_repo: PushReceiptRepo,
+        token_repo: DeviceTokenRepo,
+        batch_size: int = constants.EXPO.RECEIPT_BATCH_SIZE,
+        poll_interval: float = constants.EXPO.RECEIPT_POLL_INTERVAL,
+        lease: float = constants.EXPO.RECEIPT_LEASE,
+        max_age: float = constants.EXPO.RECEIPT_MAX_AGE,
+    ):
+        self.sessionmaker = sessionmaker
+        self.expo_notification = expo_notification
+        self.receipt_repo = receipt_repo
+        self.token_repo = token_repo
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_age = max_age
+        self._stopping: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stopping(self) -> asyncio.Event:
+        # created on first use so it binds to the running loop
+        if self._stopping is None:
+            self._stopping = asyncio.Event()
+        return self._stopping
+
+    async def start(self):
+        if self._task is None:
+            self.stopping.clear()
+            self._task = asyncio.create_task(self.run(), name="push-receipt-poller")
+
+    async def stop(self):
+        """let the batch in flight settle, then return"""
+        if self._task is not None:
+            self.stopping.set()
+            await self._task
+            self._task = None
+
+    async def run(self):
+        while not self.stopping.is_set():
+            try:
+                polled = await self.poll_once()
+            except Exception as err:
+                logger.error("push receipt poll failed : %s", err)
+                polled = 0
+            # a full batch means more tickets are likely due, go again at once
+            if polled < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self.stopping.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    async def poll_once(self) -> int:
+        """check one batch of due tickets, returns how many were claimed"""
+
+        async def _claim(session: AsyncSession):
+            return await self.receipt_repo.claim_due(
+                session=session, limit=self.batch_size, lease=self.lease
+            )
+
+        pending = await run_transaction(self.sessionmaker, _claim)
+        if not pending:
+            return 0
+
+        receipts = await self.expo_notification.get_receipts(
+            [ticket.ticket_id for ticket in pending]
+        )
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        dead_tokens, done = [], []
+        for ticket in pending:
+            receipt = receipts.get(ticket.ticket_id)
+            if receipt is not None:
+                done.append(ticket.ticket_id)
+                if (receipt.details or {}).get(
+                    "error"
+                ) == PushTicket.ERROR_DEVICE_NOT_REGISTERED:
+                    dead_tokens.append(ticket.token)
+            elif (current_time - ticket.created_at).total_seconds() > self.max_age:
+                # expo no longer has a receipt for it
+                done.append(ticket.ticket_id)
+
+        async def _settle(session: AsyncSession):
+            await self.token_repo.delete_device_tokens(
+                session=session, tokens=dead_tokens
+            )
+            await self.receipt_repo.delete_receipts(session=session, ticket_ids=done)
+
+        await run_transaction(self.sessionmaker, _settle)
+        metrics.inc("push.receipts.checked", len(done))
+        metrics.inc("push.receipts.dead_tokens", len(dead_tokens))
+        return len(pending)
@@ -0,0 +1,35 @@
+"""backoff policy for failed expo pushes"""
+
+import random
+
+from ..config.constants import get_settings
+
+constants = get_settings()
+
+
+class RetryPolicy:
+    """exponential backoff with jitter, bounded by attempt count and message age"""
+
+    def __init__(
+        self,
+        base_delay: float = constants.EXPO.PUSH_RETRY_BASE_DELAY,
+        max_delay: float = constants.EXPO.PUSH_RETRY_MAX_DELAY,
+        max_attempts: int = constants.EXPO.PUSH_RETRY_MAX_ATTEMPTS,
+        max_age: float = constants.EXPO.PUSH_RETRY_MAX_AGE,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.max_age = max_age
+
+    def next_delay(self, attempts: int) -> float:
+        """delay before the attempt following `attempts` failed ones"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        # +-20% so retries of one burst do not line up again
+        return delay * random.uniform(0.8, 1.2)
+
+    def should_retry(self, attempts: int, age: float) -> bool:
+        """`age` is seconds since the first attempt"""
+        if attempts >= self.max_attempts:
+            return False
+        return age + self.next_delay(attempts) <= self.max_age
@@ -0,0 +1,242 @@
+"""per-worker revocation index of blacklisted access tokens in front of AccessTokenBlacklistRepo"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+import pytz
+from cachetools import TLRUCache
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config.constants import get_settings
+from ..cockroach_sql.database import database
+from ..cockroach_sql.dao.tokens_dao import AccessTokenBlacklistRepo
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+
+_WATERMARK_OVERLAP = timedelta(seconds=30)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """the timestamp columns are mapped as naive UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(pytz.UTC).replace(tzinfo=None)
+    return value
+
+
+def _expiry_timestamp(expires_on: datetime) -> float:
+    """epoch seconds for a blacklist expiry, naive values are stored in UTC"""
+    if expires_on.tzinfo is None:
+        expires_on = expires_on.replace(tzinfo=pytz.UTC)
+    return expires_on.timestamp()
+
+
+class BloomFilter:
+    """
+    Fixed size bloom filter over string keys.
+
+    `key in filter` is False only for keys that were never added, a True answer
+    may be a false positive with probability close to `error_rate`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+class AccessTokenBlacklistCache:
+    """
+    Shared revocation index of blacklisted access tokens, one per worker.
+
+    - loaded at startup from access_token_blacklists, then refreshed incrementally
+      by polling rows created after a watermark every `poll_interval` seconds.
+    - known blacklisted jtis are held until the token's exp.
+    - a bloom filter of every live blacklist row answers the common "not
+      blacklisted" case, it is rebuilt every `refresh_interval` seconds to shed
+      expired rows.
+    - a filter hit that is not a known entry falls back to the table.
+
+    Signouts served by this worker are written through immediately, signouts on
+    other workers become visible on the next poll.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: Optional[async_sessionmaker] = None,
+        repo: Optional[AccessTokenBlacklistRepo] = None,
+        maxsize: int = constants.JT.BLACKLIST_CACHE_SIZE,
+        refresh_interval: int = constants.JT.BLACKLIST_FILTER_REFRESH,
+        poll_interval: int = constants.JT.BLACKLIST_POLL_INTERVAL,
+        error_rate: float = constants.JT.BLACKLIST_FILTER_ERROR_RATE,
+    ):
+        self._sessionmaker = sessionmaker
+        self.repo = repo or AccessTokenBlacklistRepo()
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.error_rate = error_rate
+        self._entries = TLRUCache(
+            maxsize=maxsize, ttu=lambda _jti, exp, _now: exp, timer=time.time
+        )
+        self._filter: Optional[BloomFilter] = None
+        self._filter_built_at = 0.0
+        self._watermark: Optional[datetime] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def sessionmaker(self) -> async_sessionmaker:
+        if self._sessionmaker is None:
+            self._sessionmaker = database.get_session()
+        return self._sessionmaker
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # created lazily so it binds to the running loop, not the import-time one
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def add(self, jti: str, expires_on: datetime):
+        """write through a freshly blacklisted token"""
+        exp = _expiry_timestamp(expires_on)
+        if exp <= time.time():
+            return
+        self._entries[jti] = exp
+        if self._filter is not None:
+            self._filter.add(jti)
+
+    def _advance_watermark(self, created_at: Optional[datetime]):
+        if created_at is None:
+            return
+        created_at = _naive_utc(created_at)
+        if self._watermark is None or created_at > self._watermark:
+            self._watermark = created_at
+
+    def _filter_is_stale(self) -> bool:
+        return (
+            self._filter is None
+            or time.monotonic() - self._filter_built_at >= self.refresh_interval
+        )
+
+    async def load(self):
+        """(re)build the index and its filter from every live blacklist row"""
+        async with self.lock:
+            try:
+                async with self.sessionmaker() as session:
+                    rows = await self.repo.get_active_ids(session=session)
+            except Exception as err:
+                # without a filter every lookup falls back to the table
+                logger.error("error : %s", err)
+                self._filter = None
+                return
+
+            bloom = BloomFilter(capacity=len(rows) * 2, error_rate=self.error_rate)
+            for jti, expires_on, created_at in rows:
+                bloom.add(str(jti))
+                self.add(str(jti), expires_on)
+                self._advance_watermark(created_at)
+            # keep write-throughs that raced with the snapshot
+            for jti in list(self._entries.keys()):
+                bloom.add(jti)
+
+            self._filter = bloom
+            self._filter_built_at = time.monotonic()
+            logger.debug("access token revocation index loaded : %s rows", len(rows))
+
+    async def poll(self):
+        """pull blacklist rows created after the watermark into the index"""
+        if self._filter is None:
+            await self.load()
+            return
+
+        created_after = None
+        if self._watermark is not None:
+            # rows commit a little after their created_at, re-read a short overlap
+            created_after = self._watermark - _WATERMARK_OVERLAP
+
+        async with self.sessionmaker() as session:
+            rows = await self.repo.get_active_ids(
+                session=session, created_after=created_after
+            )
+
+        for jti, expires_on, created_at in rows:
+            self.add(str(jti), expires_on)
+            self._advance_watermark(created_at)
+        if rows:
+            logger.debug("access token revocation index polled : %s rows", len(rows))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if self._filter_is_stale():
+                    await self.load()
+                else:
+                    await self.poll()
+            except Exception as err:
+                logger.error("error : %s", err)
+
+    async def start(self):
+        """load the index and start polling, called once per worker on startup"""
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """stop polling, called on shutdown"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def is_blacklisted(self, jti: str) -> bool:
+        """check a jti against the index, the filter and finally the table"""
+        if jti in self._entries:
+            return True
+
+        # without the background poller keep the filter fresh on the request path
+        if self._task is None and self._filter_is_stale():
+            await self.load()
+
+        if self._filter is not None and jti not in self._filter:
+            return False
+
+        async with self.sessionmaker() as session:
+            at_model = await self.repo.get_obj(session=session, obj_id=UUID(jti))
+
+        if at_model is None:
+            return False
+        self.add(jti, at_model.expires_on)
+        return True
+
+
+access_token_blacklist = AccessTokenBlacklistCache()
@@ -0,0 +1,39 @@
+"""per worker cache of unread notification counts in front of NotificationCounterRepository"""
+
+import time
+from typing import Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+
+from ..config.constants import get_settings
+from ..helperClass.metrics import metrics
+
+constants = get_settings()
+
+
+class UnreadCountCache:
+    """
+    Short lived cache of each user's unread badge count.
+
+    Entries are dropped when this worker changes the count, changes made
+    through other workers show within `ttl`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = constants.EXPO.UNREAD_CACHE_SIZE,
+        ttl: float = constants.EXPO.UNREAD_CACHE_TTL,
+    ):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, timer=time.monotonic)
+
+    def get(self, user_id: UUID) -> Optional[int]:
+        value = self._entries.get(user_id)
+        metrics.inc("unread_cache.misses" if value is None else "unread_cache.hits")
+        return value
+
+    def put(self, user_id: UUID, unread: int):
+        self._entries[user_id] = unread
+
+    def invalidate(self, user_id: UUID):
+        self._entries.pop(user_id, None)
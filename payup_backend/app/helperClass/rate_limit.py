@@ -0,0 +1,42 @@
+"""token bucket shared by everything sending through one rate limited api"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `capacity`. `acquire` waits until
+    the requested amount is available, callers are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # created on first use so it binds to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def acquire(self, amount: float = 1):
+        if amount > self.capacity:
+            raise ValueError(f"cannot acquire {amount}, capacity is {self.capacity}")
+        # holding the lock while waiting keeps later callers queued behind
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
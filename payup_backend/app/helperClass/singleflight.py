@@ -0,0 +1,75 @@
+"""coalesce concurrent identical calls into one in-flight awaitable"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+
+def _retrieve_exception(task: asyncio.Task):
+    # keeps asyncio from logging "exception was never retrieved" when no
+    # caller was waiting on the shared task
+    if not task.cancelled():
+        task.exception()
+
+
+class _Flight:
+    """one in-flight call and the number of callers awaiting it"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    The first caller for a (provider, operation, key) starts `func` in its own
+    task, callers arriving while it is in flight await the same result or
+    exception instead of starting their own call. Nothing is kept once the
+    call finishes.
+
+    Every caller awaits the task through a shield, so a cancelled caller only
+    stops waiting. The call itself is cancelled once no caller is left.
+
+    The result object is shared between all coalesced callers.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str, Hashable], _Flight] = {}
+
+    def _forget(self, flight_key: Tuple[str, str, Hashable], flight: _Flight):
+        if self._inflight.get(flight_key) is flight:
+            del self._inflight[flight_key]
+
+    async def do(
+        self,
+        provider: str,
+        operation: str,
+        key: Hashable,
+        func: Callable[[], Awaitable[T]],
+    ) -> T:
+        flight_key = (provider, operation, key)
+        flight = self._inflight.get(flight_key)
+        if flight is not None:
+            metrics.inc(f"singleflight.{provider}.{operation}.coalesced")
+        else:
+            metrics.inc(f"singleflight.{provider}.{operation}.calls")
+            task = asyncio.ensure_future(func())
+            task.add_done_callback(_retrieve_exception)
+            flight = _Flight(task)
+            self._inflight[flight_key] = flight
+            task.add_done_callback(lambda _: self._forget(flight_key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # the last caller gave up, later callers start a fresh call
+                self._forget(flight_key, flight)
+                flight.task.cancel()
@@ -1,15 +1,19 @@
+import asyncio
 import logging
-from typing import Union
+import time
+from typing import Any, Dict, Optional, Union
 import httpx
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from payup_backend.app.cockroach_sql.database import database
 from payup_backend.app.cockroach_sql.dao.kyc_dao import KycEntityRepo
 from payup_backend.app.cockroach_sql.dao.kyc_lookup_dao import KycLookupRepo
 from payup_backend.app.cockroach_sql.db_enums import KycType
 from payup_backend.app.modules.kyc.model import KycCreate, KycLookupCreate
 from payup_backend.app.utils.encryption_utils import decrypt_entity_id
 from .....config.constants import get_settings
+from ....metrics import metrics
+from ....singleflight import SingleFlight
 from .models import (
     BankVerifyRequest,
     BankVerifyResponse,
@@ -24,17 +28,82 @@ logger = logging.getLogger(__name__)
 constants = get_settings()
 
 
+def build_attestr_client() -> httpx.AsyncClient:
+    """keep-alive client shared by every attestr call of the worker"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=constants.ATTESTR.MAX_CONNECTIONS,
+            max_keepalive_connections=constants.ATTESTR.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=constants.ATTESTR.KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            constants.ATTESTR.TIMEOUT, connect=constants.ATTESTR.CONNECT_TIMEOUT
+        ),
+    )
+
+
 class Attestr:
     _base_url = constants.ATTESTR.BASE_URL
 
-    def __init__(self):
-        self.sessionmaker = database.get_session()
-        self._repo = KycEntityRepo()
-        self.lookup_repo = KycLookupRepo()
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        kyc_repo: KycEntityRepo,
+        lookup_repo: KycLookupRepo,
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: int = constants.ATTESTR.MAX_CONCURRENCY,
+        singleflight: Optional[SingleFlight] = None,
+    ):
+        self.sessionmaker = sessionmaker
+        self._repo = kyc_repo
+        self.lookup_repo = lookup_repo
         self.access_token = constants.ATTESTR.ACCESS_TOKEN
+        self.client = client or build_attestr_client()
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.singleflight = singleflight or SingleFlight()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created on first use so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def aclose(self):
+        """close pooled connections, called on app shutdown"""
+        await self.client.aclose()
+
+    async def _post(
+        self, operation: str, url: str, headers: Dict[str, str], json: Dict[str, Any]
+    ) -> httpx.Response:
+        """
+        POST through the shared client, at most `max_concurrency` at a time.
+        Records attestr.<operation>.latency_seconds (request only, excluding the
+        wait for a slot) and attestr.<operation>.errors.
+        """
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.client.post(url, headers=headers, json=json)
+            except httpx.RequestError:
+                metrics.inc(f"attestr.{operation}.errors")
+                raise
+            finally:
+                metrics.observe(
+                    f"attestr.{operation}.latency_seconds", time.perf_counter() - start
+                )
+        if response.is_error:
+            metrics.inc(f"attestr.{operation}.errors")
+        return response
 
     async def verifyUpi(self, upi_id: str) -> UpiVerifyResponse:
         """Verify UPI VPA and get account holder details."""
+        return await self.singleflight.do(
+            "attestr", "upi", upi_id.strip().lower(), lambda: self._verify_upi(upi_id)
+        )
+
+    async def _verify_upi(self, upi_id: str) -> UpiVerifyResponse:
         url = f"{self._base_url}/v1/public/finanx/vpa"
 
         headers = {
@@ -46,16 +115,13 @@ class Attestr:
         request_data = UpiVerifyRequest(vpa=upi_id).model_dump()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, headers=headers, json=request_data, timeout=20
-                )
+            response = await self._post("upi", url, headers, request_data)
 
-                logger.info("Status code: %s", response.status_code)
+            logger.info("Status code: %s", response.status_code)
 
-                response.raise_for_status()
+            response.raise_for_status()
 
-                return UpiVerifyResponse.model_validate(response.json())
+            return UpiVerifyResponse.model_validate(response.json())
 
         except httpx.RequestError as e:
             try:
@@ -72,6 +138,16 @@ class Attestr:
 
     async def verifyPan(self, pan_number: str) -> Union[KycCreate, PanVerifyResponse]:
         """Verify PAN number."""
+        # coalescing also keeps concurrent first verifications of a PAN from
+        # racing on the kyc entity and lookup inserts
+        return await self.singleflight.do(
+            "attestr",
+            "pan",
+            pan_number.strip().upper(),
+            lambda: self._verify_pan(pan_number),
+        )
+
+    async def _verify_pan(self, pan_number: str) -> Union[KycCreate, PanVerifyResponse]:
         # First, check if PAN already exists and is verified in the lookup table
         async with self.sessionmaker() as session:
             kyc_lookup_list = await self.lookup_repo.get_obj_by_filter(
@@ -132,48 +208,45 @@ class Attestr:
         request_data = PanVerifyRequest(pan=pan_number).model_dump()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, headers=headers, json=request_data, timeout=20
-                )
+            response = await self._post("pan", url, headers, request_data)
+
+            response.raise_for_status()
+
+            verification = PanVerifyResponse.model_validate(response.json())
+
+            logger.info("Verification result from Attestr: %s", verification)
+
+            if verification.valid and verification.name:
+                logger.info("PAN %s verified successfully", pan_number)
+
+                # Store verified PAN in KYC tables
+                async with self.sessionmaker() as session:
+                    kyc = await self._repo.create_obj(
+                        session=session,
+                        p_model=KycCreate(
+                            entity_id=pan_number,
+                            entity_name=verification.name,
+                            entity_type=KycType.PAN.value,
+                            gender=verification.gender,
+                            zip=str(verification.zip),
+                            category=verification.category,
+                            verified=True,
+                            birthorincorporateddate=verification.birthOrIncorporatedDate,
+                        ),
+                    )
+
+                    await self.lookup_repo.create_obj(
+                        session=session,
+                        p_model=KycLookupCreate(
+                            entity_id=pan_number,
+                            entity_type=KycType.PAN.value,
+                        ),
+                    )
+                    await session.commit()
+
+                    logger.info("Stored verified PAN %s in KYC tables", pan_number)
 
-                response.raise_for_status()
-
-                verification = PanVerifyResponse.model_validate(response.json())
-
-                logger.info("Verification result from Attestr: %s", verification)
-
-                if verification.valid and verification.name:
-                    logger.info("PAN %s verified successfully", pan_number)
-
-                    # Store verified PAN in KYC tables
-                    async with self.sessionmaker() as session:
-                        kyc = await self._repo.create_obj(
-                            session=session,
-                            p_model=KycCreate(
-                                entity_id=pan_number,
-                                entity_name=verification.name,
-                                entity_type=KycType.PAN.value,
-                                gender=verification.gender,
-                                zip=str(verification.zip),
-                                category=verification.category,
-                                verified=True,
-                                birthorincorporateddate=verification.birthOrIncorporatedDate,
-                            ),
-                        )
-
-                        await self.lookup_repo.create_obj(
-                            session=session,
-                            p_model=KycLookupCreate(
-                                entity_id=pan_number,
-                                entity_type=KycType.PAN.value,
-                            ),
-                        )
-                        await session.commit()
-
-                        logger.info("Stored verified PAN %s in KYC tables", pan_number)
-
-                return PanVerifyResponse.model_validate(response.json())
+            return PanVerifyResponse.model_validate(response.json())
         except httpx.RequestError as e:
             try:
                 error_data = AttestError.model_validate(response.json())
@@ -191,6 +264,14 @@ class Attestr:
 
     async def verifyBank(self, account_number: str, ifsc: str) -> BankVerifyResponse:
         """Verify Bank account and IFSC."""
+        return await self.singleflight.do(
+            "attestr",
+            "bank",
+            (account_number.strip().replace(" ", ""), ifsc.strip().upper()),
+            lambda: self._verify_bank(account_number, ifsc),
+        )
+
+    async def _verify_bank(self, account_number: str, ifsc: str) -> BankVerifyResponse:
         url = f"{self._base_url}/v1/public/finanx/acc"
 
         headers = {
@@ -204,14 +285,11 @@ class Attestr:
         ).model_dump()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, headers=headers, json=request_data, timeout=20
-                )
+            response = await self._post("bank", url, headers, request_data)
 
-                response.raise_for_status()
+            response.raise_for_status()
 
-                return BankVerifyResponse.model_validate(response.json())
+            return BankVerifyResponse.model_validate(response.json())
         except httpx.RequestError as e:
             try:
                 error_data = AttestError.model_validate(response.json())
@@ -1,8 +1,9 @@
 """interface to sandbox api"""
 
 import logging
-import requests
 from typing import Optional
+
+import httpx
 from fastapi import HTTPException, status
 
 from .models import (
@@ -17,23 +18,66 @@ from .....modules.kyc.pan.pan_model import (
     AadhaarOtpRequestSchema,
 )
 from .....config.constants import get_settings
-
+from ....singleflight import SingleFlight
+from .token_manager import SandboxTokenManager
 
 logger = logging.getLogger(__name__)
 
 constants = get_settings()
 
 
+def build_sandbox_client() -> httpx.AsyncClient:
+    """keep-alive http/2 client shared by every sandbox call of the worker"""
+    return httpx.AsyncClient(
+        http2=constants.SANDBOX.HTTP2,
+        limits=httpx.Limits(
+            max_connections=constants.SANDBOX.MAX_CONNECTIONS,
+            max_keepalive_connections=constants.SANDBOX.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=constants.SANDBOX.KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            constants.SANDBOX.PAN_TIMEOUT, connect=constants.SANDBOX.CONNECT_TIMEOUT
+        ),
+    )
+
+
+def _timeout(read: float) -> httpx.Timeout:
+    return httpx.Timeout(read, connect=constants.SANDBOX.CONNECT_TIMEOUT)
+
+
 class Sandbox:
     _base_url = "https://api.sandbox.co.in"
 
-    def __init__(self, sandbox_api_key: str, sandbox_secret: str):
+    def __init__(
+        self,
+        sandbox_api_key: str,
+        sandbox_secret: str,
+        client: Optional[httpx.AsyncClient] = None,
+        singleflight: Optional[SingleFlight] = None,
+    ):
         self.api_key = sandbox_api_key
         self.api_secret = sandbox_secret
-        self.access_token = constants.SANDBOX.ACCESS_TOKEN
-        self.token_expiry = None
-
-    async def authenticate(self):
+        self.client = client or build_sandbox_client()
+        self.singleflight = singleflight or SingleFlight()
+        self.token_manager = SandboxTokenManager(
+            fetch_token=self.authenticate, token=constants.SANDBOX.ACCESS_TOKEN
+        )
+
+    @property
+    def access_token(self) -> Optional[str]:
+        return self.token_manager.token
+
+    async def start(self):
+        """start the background token refresh, called on app startup"""
+        await self.token_manager.start()
+
+    async def aclose(self):
+        """stop the token refresh and close pooled connections, called on app shutdown"""
+        await self.token_manager.stop()
+        await self.client.aclose()
+
+    async def authenticate(self) -> str:
+        """fetch a new access token, callers go through token_manager"""
         if not self.api_key or not self.api_secret:
             logger.error("API key or secret is missing.")
             raise HTTPException(
@@ -50,13 +94,14 @@ class Sandbox:
         }
 
         try:
-            response = requests.post(url, headers=headers, timeout=20)
+            response = await self.client.post(
+                url, headers=headers, timeout=_timeout(constants.SANDBOX.AUTH_TIMEOUT)
+            )
             response.raise_for_status()
             data = response.json()
-            self.access_token = data.get("access_token")
-            constants.SANDBOX.update_access_token(self.access_token)
-            logger.info(constants.SANDBOX.ACCESS_TOKEN == self.access_token)
-        except requests.RequestException as e:
+            return data.get("access_token")
+        except httpx.HTTPStatusError as e:
+            response = e.response
             logger.error("Failed to authenticate: %s", e)
             raise HTTPException(
                 detail=e.args[0], status_code=response.status_code
@@ -67,57 +112,22 @@ class Sandbox:
                 detail="Something went wrong, please try again later",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             ) from e
-        finally:
-            response.close()
-
-    async def refresh_token(self, code: Optional[int] = None):
-        if not self.access_token or code is None:
-            logger.error("Authentication is required before refreshing the token.")
-            return await self.authenticate()
-        if code == 403:
-            logger.info("got 403 response")
-            return await self.authenticate()
-
-        url = f"{self._base_url}/authorize"
-        headers = {
-            "accept": "application/json",
-            "Authorization": self.access_token,
-            "x-api-key": self.api_key,
-            "x-api-version": "1.0",
-        }
-        logger.info("Refreshing token...")
 
-        try:
-            response = requests.post(url, headers=headers, timeout=20)
-            response.raise_for_status()
-            data = response.json()
-            # got 403 response
-            code = data.get("code")
-            if code == 200:
-                self.access_token = data.get("access_token")
-                constants.SANDBOX.update_access_token(self.access_token)
-
-            logger.info("Token refreshed successfully.")
-        except requests.RequestException as e:
-            logger.error("Failed to refresh token: %s", e)
-            raise HTTPException(
-                detail=e.args[0], status_code=response.status_code
-            ) from e
-        except Exception as e:
-            logger.error("Failed to authenticate: %s", e)
-            raise HTTPException(
-                detail="Something went wrong, please try again later",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            ) from e
-        finally:
-            response.close()
+    async def refresh_token(self, stale_token: Optional[str]) -> str:
+        """
+        Replace a token the api rejected. Requests that failed with the same
+        token share one re-authentication, a token already replaced by another
+        caller is returned as is.
+        """
+        logger.info("Refreshing token...")
+        return await self.token_manager.refresh(stale_token=stale_token, force=True)
 
     async def verifyPan(self, pan_data: SandboxPANVerifyData):
 
         url = f"{self._base_url}/kyc/pan/verify"
         headers = {
             "accept": "application/json",
-            "Authorization": self.access_token,
+            "Authorization": await self.token_manager.get_token(),
             "x-api-key": self.api_key,
             "x-api-version": "1.0",
             "content-type": "application/json",
@@ -125,7 +135,12 @@ class Sandbox:
         try:
             payload = pan_data.model_dump(by_alias=True)
             logger.info("payload: \n%s", payload)
-            response = requests.post(url, headers=headers, timeout=20, json=payload)
+            response = await self.client.post(
+                url,
+                headers=headers,
+                timeout=_timeout(constants.SANDBOX.PAN_TIMEOUT),
+                json=payload,
+            )
             logger.info("status code: %s", response.status_code)
             data = response.json()
 
@@ -133,10 +148,15 @@ class Sandbox:
                 logger.error(
                     "Token expired. Refreshing token...%s", str(response.content)
                 )
-                code = data.get("code")
-                await self.refresh_token(code)
-                headers["Authorization"] = self.access_token
-                response = requests.post(url, headers=headers, timeout=20, json=payload)
+                headers["Authorization"] = await self.refresh_token(
+                    headers["Authorization"]
+                )
+                response = await self.client.post(
+                    url,
+                    headers=headers,
+                    timeout=_timeout(constants.SANDBOX.PAN_TIMEOUT),
+                    json=payload,
+                )
 
             if response.status_code == 400:
                 logger.info("request error..%s", str(response.content))
@@ -146,7 +166,8 @@ class Sandbox:
 
             response.raise_for_status()
             return SandboxPANVerifyResponse.model_validate(response.json())
-        except requests.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            response = e.response
             data = response.json()
             message = data.get("message", "No message found")
             logger.error("Message: %s", message)
@@ -157,33 +178,37 @@ class Sandbox:
                 detail="Something went wrong, please try again later",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             ) from e
-        finally:
-            response.close()
 
     async def old_verifyPan(self, pan_number):
 
         url = f"{self._base_url}/pans/{pan_number}/verify?consent=y&reason=For%20KYC%20of%20User"
         headers = {
             "accept": "application/json",
-            "Authorization": self.access_token,
+            "Authorization": await self.token_manager.get_token(),
             "x-api-key": self.api_key,
             "x-api-version": "1.0",
         }
         try:
-            response = requests.get(url, headers=headers, timeout=20)
-            if response.status_code >= 400:
+            response = await self.client.get(
+                url, headers=headers, timeout=_timeout(constants.SANDBOX.PAN_TIMEOUT)
+            )
+            if response.status_code == 403:
                 logger.info(
                     "Token expired. Refreshing token...%s", str(response.content)
                 )
-                data = response.json()
-                code = data.get("code")
-                await self.refresh_token(code)
-                headers["Authorization"] = self.access_token
-                response = requests.get(url, headers=headers, timeout=20)
+                headers["Authorization"] = await self.refresh_token(
+                    headers["Authorization"]
+                )
+                response = await self.client.get(
+                    url,
+                    headers=headers,
+                    timeout=_timeout(constants.SANDBOX.PAN_TIMEOUT),
+                )
 
             response.raise_for_status()
             return SandboxPANVerifyResponse.model_validate(response.json())
-        except requests.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            response = e.response
             logger.error("Failed to verify PAN: %s", e)
             raise HTTPException(
                 detail=e.args[0], status_code=response.status_code
@@ -193,38 +218,50 @@ class Sandbox:
             raise HTTPException(
                 detail=e.args[0], status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             ) from e
-        finally:
-            response.close()
 
     async def otpAadhaar(self, body: AadhaarOtpRequestSchema):
+        return await self.singleflight.do(
+            "sandbox",
+            "aadhaar_otp",
+            body.aadhaar_number,
+            lambda: self._otp_aadhaar(body),
+        )
+
+    async def _otp_aadhaar(self, body: AadhaarOtpRequestSchema):
 
         url = f"{self._base_url}/kyc/aadhaar/okyc/otp"
 
         headers = {
             "accept": "application/json",
-            "Authorization": self.access_token,
+            "Authorization": await self.token_manager.get_token(),
             "x-api-key": self.api_key,
             "x-api-version": "1.0",
             "content-type": "application/json",
         }
 
         try:
-            response = requests.post(
-                url, json=body.model_dump(), headers=headers, timeout=20
+            response = await self.client.post(
+                url,
+                json=body.model_dump(),
+                headers=headers,
+                timeout=_timeout(constants.SANDBOX.AADHAAR_OTP_TIMEOUT),
             )
-            if response.status_code >= 400:
+            if response.status_code == 403:
                 logger.info("Token expired. Refreshing token...")
-                data = response.json()
-                code = data.get("code")
-                await self.refresh_token(code)
-                headers["Authorization"] = self.access_token
-                response = requests.post(
-                    url, json=body.model_dump(), headers=headers, timeout=20
+                headers["Authorization"] = await self.refresh_token(
+                    headers["Authorization"]
+                )
+                response = await self.client.post(
+                    url,
+                    json=body.model_dump(),
+                    headers=headers,
+                    timeout=_timeout(constants.SANDBOX.AADHAAR_OTP_TIMEOUT),
                 )
 
             response.raise_for_status()
             return SandboxAadhaarOtpResponse.model_validate(response.json())
-        except requests.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            response = e.response
             logger.error("Failed to send OTP: %s", e.args)
             raise HTTPException(
                 detail=e.args[0], status_code=response.status_code
@@ -234,16 +271,22 @@ class Sandbox:
             raise HTTPException(
                 detail=e.args[0], status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             ) from e
-        finally:
-            response.close()
 
     async def verifyAadhaar(self, body: AadhaarVerifyRequestSchema):
+        return await self.singleflight.do(
+            "sandbox",
+            "aadhaar_verify",
+            (body.ref_id, body.otp),
+            lambda: self._verify_aadhaar(body),
+        )
+
+    async def _verify_aadhaar(self, body: AadhaarVerifyRequestSchema):
 
         url = f"{self._base_url}/kyc/aadhaar/okyc/otp/verify"
 
         headers = {
             "accept": "application/json",
-            "Authorization": self.access_token,
+            "Authorization": await self.token_manager.get_token(),
             "x-api-key": self.api_key,
             "x-api-version": "1.0",
             "content-type": "application/json",
@@ -251,7 +294,12 @@ class Sandbox:
 
         try:
             payload = body.model_dump()
-            response = requests.post(url, json=payload, headers=headers, timeout=20)
+            response = await self.client.post(
+                url,
+                json=payload,
+                headers=headers,
+                timeout=_timeout(constants.SANDBOX.AADHAAR_VERIFY_TIMEOUT),
+            )
             logger.info("status code: %s", response.status_code)
             data = response.json()
 
@@ -259,10 +307,15 @@ class Sandbox:
                 logger.error(
                     "Token expired. Refreshing token...%s", str(response.content)
                 )
-                code = data.get("code")
-                await self.refresh_token(code)
-                headers["Authorization"] = self.access_token
-                response = requests.post(url, headers=headers, timeout=20, json=payload)
+                headers["Authorization"] = await self.refresh_token(
+                    headers["Authorization"]
+                )
+                response = await self.client.post(
+                    url,
+                    headers=headers,
+                    timeout=_timeout(constants.SANDBOX.AADHAAR_VERIFY_TIMEOUT),
+                    json=payload,
+                )
                 data = response.json()
 
             if response.status_code == 400:
@@ -280,7 +333,8 @@ class Sandbox:
 
             response.raise_for_status()
             return SandboxAadhaarVerifyResponse.model_validate(response.json())
-        except requests.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            response = e.response
             data = response.json()
             message = data.get("message", "No message found")
             logger.error("Message: %s", message)
@@ -292,22 +346,22 @@ class Sandbox:
             raise HTTPException(
                 detail=e.args[0], status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             ) from e
-        finally:
-            response.close()
 
     async def verifyUpi(self, upi_id: str):
         url = f"{self._base_url}/bank/upi/{upi_id}"
 
         headers = {
             "accept": "application/json",
-            "Authorization": self.access_token,
+            "Authorization": await self.token_manager.get_token(),
             "x-api-key": self.api_key,
             "x-api-version": "1.0",
             "content-type": "application/json",
         }
 
         try:
-            response = requests.get(url, headers=headers, timeout=20)
+            response = await self.client.get(
+                url, headers=headers, timeout=_timeout(constants.SANDBOX.UPI_TIMEOUT)
+            )
             logger.info("status code: %s", response.status_code)
             data = response.json()
 
@@ -315,27 +369,24 @@ class Sandbox:
                 logger.error(
                     "Token expired. Refreshing token...%s", str(response.content)
                 )
-                code = data.get("code")
-                await self.refresh_token(code)
-                headers["Authorization"] = self.access_token
-                response = requests.post(
+                headers["Authorization"] = await self.refresh_token(
+                    headers["Authorization"]
+                )
+                response = await self.client.get(
                     url,
                     headers=headers,
-                    timeout=20,
+                    timeout=_timeout(constants.SANDBOX.UPI_TIMEOUT),
                 )
                 data = response.json()
 
             if response.status_code == 503:
                 logger.error(
-                    "Token expired. Refreshing token...%s", str(response.content)
+                    "Service unavailable, retrying...%s", str(response.content)
                 )
-                code = data.get("code")
-                await self.refresh_token(code)
-                headers["Authorization"] = self.access_token
-                response = requests.post(
+                response = await self.client.get(
                     url,
                     headers=headers,
-                    timeout=20,
+                    timeout=_timeout(constants.SANDBOX.UPI_TIMEOUT),
                 )
                 data = response.json()
 
@@ -349,7 +400,8 @@ class Sandbox:
             response.raise_for_status()
 
             return SandboxUpiVerifyResponse.model_validate(response.json())
-        except requests.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            response = e.response
             data = response.json()
             message = data.get("message", "No message found")
             logger.error("Message: %s", message)
@@ -361,8 +413,6 @@ class Sandbox:
             raise HTTPException(
                 detail=e.args[0], status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             ) from e
-        finally:
-            response.close()
 
 
 # Usage
@@ -0,0 +1,116 @@
+"""in-memory sandbox access token, refreshed ahead of its expiry"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import jwt
+
+from .....config.constants import get_settings
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+
+def token_expiry(token: str, default_ttl: float) -> float:
+    """
+    epoch seconds at which `token` lapses, read from its unverified exp claim.
+    Falls back to `default_ttl` from now for tokens that are not JWTs or carry
+    no exp.
+    """
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return float(claims["exp"])
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        return time.time() + default_ttl
+
+
+class SandboxTokenManager:
+    """
+    Holds the access token for one Sandbox client.
+
+    `get_token` hands out the current token and only blocks when it has lapsed.
+    A background task re-authenticates `refresh_margin` seconds before expiry.
+    All refreshes run under one lock and re-check the token once they hold it,
+    so concurrent callers share a single authenticate round trip.
+    """
+
+    def __init__(
+        self,
+        fetch_token: Callable[[], Awaitable[str]],
+        token: Optional[str] = None,
+        refresh_margin: float = constants.SANDBOX.TOKEN_REFRESH_MARGIN,
+        default_ttl: float = constants.SANDBOX.TOKEN_DEFAULT_TTL,
+        retry_interval: float = constants.SANDBOX.TOKEN_RETRY_INTERVAL,
+    ):
+        self._fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.retry_interval = retry_interval
+        self.token = token or None
+        self.expires_at = token_expiry(token, default_ttl) if token else 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # created on first use so it binds to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _is_fresh(self) -> bool:
+        return self.token is not None and time.time() < self.expires_at
+
+    async def get_token(self) -> str:
+        if self._is_fresh():
+            return self.token
+        return await self.refresh(stale_token=self.token)
+
+    async def refresh(self, stale_token: Optional[str] = None, force: bool = False):
+        """
+        Re-authenticate unless another caller already replaced `stale_token`.
+        Without `force` a token that has not lapsed is kept as well. Use
+        force=True with the token a request was rejected with, e.g. on a 403.
+        """
+        async with self.lock:
+            if self.token is not None and self.token != stale_token:
+                return self.token
+            if not force and self._is_fresh():
+                return self.token
+            token = await self._fetch_token()
+            self.token = token
+            self.expires_at = token_expiry(token, self.default_ttl)
+            logger.info(
+                "sandbox token refreshed, expires in %.0fs",
+                self.expires_at - time.time(),
+            )
+            return token
+
+    async def _run(self):
+        while True:
+            delay = self.expires_at - self.refresh_margin - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.refresh(stale_token=self.token, force=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.error("sandbox token refresh failed : %s", err)
+                await asyncio.sleep(self.retry_interval)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="sandbox-token-refresh")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
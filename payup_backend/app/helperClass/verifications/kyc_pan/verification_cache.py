@@ -0,0 +1,68 @@
+"""per worker cache of upi and bank account verification results"""
+
+import time
+from typing import Hashable, Optional
+
+from cachetools import TLRUCache
+
+from ...metrics import metrics
+from .attestr.models import BankVerifyResponse, UpiVerifyResponse
+from ....config.constants import get_settings
+
+constants = get_settings()
+
+
+def normalize_vpa(upi_id: str) -> str:
+    """vpas are case insensitive"""
+    return upi_id.strip().lower()
+
+
+def normalize_bank_account(account_number: str, ifsc: str) -> tuple[str, str]:
+    return account_number.strip().replace(" ", ""), ifsc.strip().upper()
+
+
+class VerificationCache:
+    """
+    Bounded TTL cache of vendor verification responses.
+
+    Valid results are kept for `success_ttl` seconds. Definitive negatives, a
+    response the vendor returned with valid=False, are kept for the shorter
+    `negative_ttl`. Transport errors and 4xx/5xx responses never reach the cache.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = constants.ATTESTR.VERIFY_CACHE_SIZE,
+        success_ttl: float = constants.ATTESTR.VERIFY_CACHE_TTL,
+        negative_ttl: float = constants.ATTESTR.VERIFY_CACHE_NEGATIVE_TTL,
+    ):
+        self.success_ttl = success_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = TLRUCache(
+            maxsize=maxsize, ttu=self._expires_at, timer=time.monotonic
+        )
+
+    def _expires_at(self, _key, value, now: float) -> float:
+        return now + (self.success_ttl if value.valid else self.negative_ttl)
+
+    def _get(self, key: Hashable):
+        value = self._entries.get(key)
+        if value is None:
+            metrics.inc("verification_cache.misses")
+            return None
+        metrics.inc("verification_cache.hits")
+        # callers are free to mutate what they get back
+        return value.model_copy()
+
+    def get_upi(self, upi_id: str) -> Optional[UpiVerifyResponse]:
+        return self._get(("upi", normalize_vpa(upi_id)))
+
+    def put_upi(self, upi_id: str, result: UpiVerifyResponse):
+        self._entries[("upi", normalize_vpa(upi_id))] = result.model_copy()
+
+    def get_bank(self, account_number: str, ifsc: str) -> Optional[BankVerifyResponse]:
+        return self._get(("bank",) + normalize_bank_account(account_number, ifsc))
+
+    def put_bank(self, account_number: str, ifsc: str, result: BankVerifyResponse):
+        key = ("bank",) + normalize_bank_account(account_number, ifsc)
+        self._entries[key] = result.model_copy()
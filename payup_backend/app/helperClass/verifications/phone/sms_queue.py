@@ -0,0 +1,194 @@
+"""background sms delivery, keeps the blocking twilio client off the event loop"""
+
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+import pytz
+from cachetools import LRUCache
+from pydantic import BaseModel, ConfigDict
+from twilio.rest import Client
+from twilio.base.exceptions import TwilioRestException
+
+from ...metrics import metrics
+from ....config.constants import get_settings
+from ....config.errors import ExternalServiceError
+from ....models.py_models import BaseResponse
+
+logger = logging.getLogger(__name__)
+
+constants = get_settings()
+
+# delivery records kept for status lookups, oldest are evicted first
+_STATUS_HISTORY = 10_000
+
+
+class SmsStatus(str, Enum):
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class SmsDelivery(BaseModel):
+    """delivery state of one queued message"""
+
+    model_config = ConfigDict(validate_assignment=True)
+
+    message_id: str
+    to: str
+    status: SmsStatus = SmsStatus.QUEUED
+    provider_id: Optional[str] = None
+    error: Optional[str] = None
+    queued_at: datetime
+    sent_at: Optional[datetime] = None
+
+
+class SmsTransport(ABC):
+    """sends a single message, returns the provider's message id"""
+
+    @abstractmethod
+    async def send(self, to: str, body: str) -> str: ...
+
+
+class TwilioTransport(SmsTransport):
+    """twilio messages api, the blocking client call runs in a worker thread"""
+
+    def __init__(self, client: Optional[Client] = None):
+        self.client = client or Client(
+            constants.TWILIO.ACCOUNT_SID, constants.TWILIO.AUTH_TOKEN
+        )
+
+    def _create(self, to: str, body: str):
+        return self.client.messages.create(
+            to=to, from_=constants.TWILIO.PHONE_NUMBER, body=body
+        )
+
+    async def send(self, to: str, body: str) -> str:
+        try:
+            message = await asyncio.to_thread(self._create, to, body)
+        except TwilioRestException as twilio_error:
+            logger.error(twilio_error.args)
+            raise ExternalServiceError(
+                name=__name__, detail=BaseResponse(message=twilio_error.msg)
+            ) from twilio_error
+
+        logger.info("[TWILIO RESPONSE : %s]", message.status)
+        if message.status not in ["pending", "queued"]:
+            raise ExternalServiceError(
+                name=__name__,
+                detail=BaseResponse(message=f"[TWILIO RESPONSE : {message.status}]"),
+            )
+        return message.sid
+
+
+class FakeSmsTransport(SmsTransport):
+    """keeps messages in memory instead of sending them, for local runs and tests"""
+
+    def __init__(self):
+        self.sent: list[tuple[str, str]] = []
+
+    async def send(self, to: str, body: str) -> str:
+        self.sent.append((to, body))
+        logger.info("[FAKE SMS] to %s : %s", to, body)
+        return f"fake-{len(self.sent)}"
+
+
+class SmsDispatcher:
+    """
+    Bounded in-process queue drained by a fixed number of worker tasks.
+
+    `enqueue` returns as soon as the message is queued, delivery happens in the
+    background and its outcome is readable through `get_status`. Queued messages
+    live only in this worker's memory, anything left at shutdown after the drain
+    timeout is dropped.
+    """
+
+    def __init__(
+        self,
+        transport: SmsTransport,
+        maxsize: int = constants.TWILIO.SMS_QUEUE_SIZE,
+        workers: int = constants.TWILIO.SMS_WORKERS,
+    ):
+        self.transport = transport
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._deliveries: LRUCache = LRUCache(maxsize=_STATUS_HISTORY)
+
+    async def start(self):
+        if self._tasks:
+            return
+        # created here so the queue binds to the running loop
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"sms-worker-{i}")
+            for i in range(self.workers)
+        ]
+        metrics.gauge("sms.queue.depth", lambda: self._queue.qsize())
+
+    async def stop(self, drain_timeout: float = 5):
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("dropping %s queued sms on shutdown", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, to: str, body: str) -> SmsDelivery:
+        """queue a message for delivery, fails fast when the queue is full"""
+        if not self._tasks:
+            await self.start()
+        delivery = SmsDelivery(
+            message_id=uuid.uuid4().hex,
+            to=to,
+            queued_at=datetime.now(pytz.UTC).replace(tzinfo=None),
+        )
+        try:
+            self._queue.put_nowait((delivery, body))
+        except asyncio.QueueFull as err:
+            metrics.inc("sms.rejected")
+            raise ExternalServiceError(
+                name=__name__, detail=BaseResponse(message="SMS queue is full")
+            ) from err
+        self._deliveries[delivery.message_id] = delivery
+        metrics.inc("sms.queued")
+        return delivery
+
+    def get_status(self, message_id: str) -> Optional[SmsDelivery]:
+        return self._deliveries.get(message_id)
+
+    async def _worker(self):
+        while True:
+            delivery, body = await self._queue.get()
+            try:
+                delivery.status = SmsStatus.SENDING
+                delivery.provider_id = await self.transport.send(delivery.to, body)
+                delivery.status = SmsStatus.SENT
+                delivery.sent_at = datetime.now(pytz.UTC).replace(tzinfo=None)
+                metrics.inc("sms.sent")
+            except Exception as err:
+                delivery.status = SmsStatus.FAILED
+                delivery.error = str(getattr(err, "detail", err))
+                metrics.inc("sms.failed")
+                logger.error("sms %s failed : %s", delivery.message_id, err)
+            finally:
+                self._queue.task_done()
+
+
+def build_sms_transport(name: str = constants.TWILIO.SMS_TRANSPORT) -> SmsTransport:
+    """transport selected by TWILIO_SMS_TRANSPORT"""
+    if name == "twilio":
+        return TwilioTransport()
+    if name == "fake":
+        return FakeSmsTransport()
+    raise ValueError(f"unknown sms transport {name!r}")
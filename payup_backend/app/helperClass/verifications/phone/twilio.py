@@ -1,6 +1,7 @@
 """layer between router and data access operations. handles db connection, commit, rollback and close."""
 
 import logging
+from typing import Optional
 from fastapi import HTTPException, status
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
@@ -8,6 +9,7 @@ from twilio.base.exceptions import TwilioRestException
 from ....modules.auth.model import BaseResponse
 from ....config.constants import get_settings
 from ....config.errors import ExternalServiceError
+from .sms_queue import SmsDispatcher, build_sms_transport
 
 
 logging.basicConfig(
@@ -24,12 +26,15 @@ class TwilioService:
     The class methods interact with twilio endpoints.
     """
 
-    def __init__(self):
+    def __init__(self, sms_dispatcher: Optional[SmsDispatcher] = None):
         """
         provide Twilio client
 
+        Arguments:
+            sms_dispatcher {SmsDispatcher} -- background queue outgoing otp sms go through.
         """
         self.client = Client(constants.TWILIO.ACCOUNT_SID, constants.TWILIO.AUTH_TOKEN)
+        self.sms_dispatcher = sms_dispatcher or SmsDispatcher(build_sms_transport())
         # self.service_id
 
     async def send_otp_sms_verification_type(self, phone_number: str):
@@ -48,31 +53,13 @@ class TwilioService:
             return BaseResponse(message="OTP sent successfully")
 
     async def send_otp_sms(self, phone_number: str, otp: str):
-        """send otp via sms"""
-        try:
-            # verification = self.client.messages.create(
-            #     from_="+19144990713", body="asdadsa", to="+919990912228"
-            # )
-            verification = self.client.messages.create(
-                to="+91" + phone_number,
-                from_=constants.TWILIO.PHONE_NUMBER,
-                body=f"Dear customer, your PayUp verification code is {otp}. Valid for 30 minutes.",
-            )
-            logger.info("[TWILIO RESPONSE : %s]", verification.status)
-            if verification.status in ["pending", "queued"]:
-                return BaseResponse(message="OTP sent successfully")
-            else:
-                raise ExternalServiceError(
-                    name=__name__,
-                    detail=BaseResponse(
-                        detail=f"[TWILIO RESPONSE : {verification.status}]"
-                    ),
-                )
-        except TwilioRestException as twilio_error:
-            logger.error(twilio_error.args)
-            raise ExternalServiceError(
-                name=__name__, detail=BaseResponse(message=twilio_error.msg)
-            ) from twilio_error
+        """queue the otp sms, delivery happens in the background"""
+        delivery = await self.sms_dispatcher.enqueue(
+            to="+91" + phone_number,
+            body=f"Dear customer, your PayUp verification code is {otp}. Valid for 30 minutes.",
+        )
+        logger.info("otp sms %s queued", delivery.message_id)
+        return BaseResponse(message="OTP sent successfully")
 
     async def verify_otp(self, phone_number: str, otp: str):
         """verify phone otp via sms"""
@@ -21,10 +21,12 @@ logger = logging.getLogger(__name__)
 
 
 class AuthHandler:
-    def __init__(self, name: str):
+    def __init__(
+        self, name: str, auth_service: AuthService, token_service: TokenService
+    ):
         self.name = name
-        self.auth_service = AuthService()
-        self.token_service = TokenService()
+        self.auth_service = auth_service
+        self.token_service = token_service
 
         self.router = APIRouter()
 
@@ -3,7 +3,7 @@
 import logging
 from datetime import datetime, timedelta
 import secrets
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from fastapi import HTTPException, status
 import pytz
 
@@ -11,19 +11,16 @@ from payup_backend.app.cockroach_sql.dao.notification_dao import (
     NotificationPreferenceRepository,
 )
 
-from .model import OTPCreate, OTPResponse, OTPUpdate
+from .model import OTPResponse, OTP as OTPModel
 from ..user.service import UserService
-from ..user.model import UserCreate
 from ..profile.model import (
-    ProfileCreate,
     Profile as ProfileModel,
     ProfileWithUserId as ProfileWithUserIdModel,
 )
-from ...cockroach_sql.database import database
 from ...config.constants import get_settings
 from ...helperClass.verifications.phone.twilio import TwilioService
 from ...cockroach_sql.schemas import Profile, User
-from ...cockroach_sql.db_enums import UserType
+from ...cockroach_sql.transaction import run_transaction
 from ...cockroach_sql.dao.otp_dao import OTPRepo
 from ...cockroach_sql.dao.profile_dao import ProfileRepo
 from ...cockroach_sql.dao.user_dao import UserRepo
@@ -38,30 +35,38 @@ class AuthService:
     The class methods interact with multiple services to facilitate auth endpoints.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        user_repo: UserRepo,
+        profile_repo: ProfileRepo,
+        otp_repo: OTPRepo,
+        notification_pref_repo: NotificationPreferenceRepository,
+        twilio_service: TwilioService,
+        user_service: UserService,
+    ):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.sessionmaker = database.get_session()
+        self.sessionmaker = sessionmaker
 
-        self.user_repo = UserRepo()
-        self.profile_repo = ProfileRepo()
-        self.otp_repo = OTPRepo()
-        self.notification_pref_repo = NotificationPreferenceRepository()
+        self.user_repo = user_repo
+        self.profile_repo = profile_repo
+        self.otp_repo = otp_repo
+        self.notification_pref_repo = notification_pref_repo
 
-        self.twilio_service = TwilioService()
-        self.user_service = UserService()
+        self.twilio_service = twilio_service
+        self.user_service = user_service
 
     async def send_otp_sms(self, phone_number: str) -> OTPResponse:
         """send otp via sms"""
         try:
             logger.info("Sending OTP for %s", phone_number)
-            now = datetime.now(pytz.utc)
+            now = datetime.now(pytz.utc).replace(tzinfo=None)
             expiry_time = now + timedelta(minutes=30)
-            expiry_time = expiry_time.replace(tzinfo=None)
 
             if phone_number != "8660312110":
                 otp_new = secrets.randbelow(900000) + 100000  # Generates a 6-digit OTP
@@ -69,74 +74,32 @@ class AuthService:
                 # create random otp and store in db with expiry time
                 otp_new = 123456
 
-            async with self.sessionmaker() as session:
-                # query for profile by phone number
-                logger.info("Querying profile for %s", phone_number)
-
-                db_profile = await self.profile_repo.get_obj_by_filter(
+            async def _issue_otp(session: AsyncSession) -> OTPModel:
+                # profile bootstrap and otp upsert go out as a single statement
+                updated_db = await self.otp_repo.issue_otp(
                     session=session,
-                    col_filters=[(Profile.phone_number, phone_number)],
+                    profile=self.profile_repo.bootstrap_cte(phone_number, now),
+                    m_otp=otp_new,
+                    expires_at=expiry_time,
+                    now=now,
                 )
-
-                logger.info("db_profile: %s", db_profile)
-
-                if db_profile is None:
-                    logger.info("Creating profile for %s", phone_number)
-                    db_profile = await self.create_profile_txn(
-                        phone_number=phone_number, session=session
+                if updated_db is None:
+                    db_otp = await self.otp_repo.get_otp_by_phone(
+                        session=session, phone_number=phone_number
                     )
-                    logger.info("Profile created for %s", phone_number)
-
-                db_otp = await self.otp_repo.get_obj(
-                    session=session, obj_id=db_profile.id
-                )
-
-                if db_otp is None:
-                    # create otp entity in db
-                    updated_db = await self.otp_repo.create_obj(
-                        session=session,
-                        p_model=OTPCreate(
-                            id=db_profile.id,
-                            m_otp=otp_new,
-                            expires_at=expiry_time,
-                            attempt_remains=constants.TWILIO.MAX_SMS_ATTEMPTS - 1,
-                        ),
+                    logger.error("Not Allowed. Wait for 1 minute.")
+                    res = OTPResponse(
+                        next_at=db_otp.updated_at + timedelta(minutes=1),
+                        attempt_remains=db_otp.attempt_remains,
+                        message="Not Allowed. Wait for 1 minute.",
                     )
-                else:
-                    # update otp entity in db
-                    if db_otp.attempt_remains == 0:
-                        updated_db = await self.otp_repo.update_obj(
-                            session=session,
-                            obj_id=db_profile.id,
-                            p_model=OTPUpdate(
-                                m_otp=otp_new,
-                                expires_at=expiry_time,
-                                attempt_remains=constants.TWILIO.MAX_SMS_ATTEMPTS - 1,
-                            ),
-                        )
-                    else:
-                        if db_otp.updated_at + timedelta(minutes=1) > now:
-                            logger.error("Not Allowed. Wait for 1 minute.")
-                            res = OTPResponse(
-                                next_at=db_otp.updated_at + timedelta(minutes=1),
-                                attempt_remains=db_otp.attempt_remains,
-                                message="Not Allowed. Wait for 1 minute.",
-                            )
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail=res.model_dump_json(),
-                            )
-                        updated_db = await self.otp_repo.update_obj(
-                            session=session,
-                            obj_id=db_profile.id,
-                            p_model=OTPUpdate(
-                                m_otp=otp_new,
-                                expires_at=expiry_time,
-                                attempt_remains=db_otp.attempt_remains - 1,
-                            ),
-                        )
-
-                await session.commit()
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=res.model_dump_json(),
+                    )
+                return updated_db
+
+            updated_db = await run_transaction(self.sessionmaker, _issue_otp)
 
             if phone_number != "8660312110":
                 response = await self.twilio_service.send_otp_sms(
@@ -172,7 +135,8 @@ class AuthService:
     async def verify_otp(self, phone_number: str, otp: int) -> ProfileWithUserIdModel:
         """Verify phone OTP via SMS."""
         try:
-            async with self.sessionmaker() as session:
+
+            async def _consume_otp(session: AsyncSession):
                 # Get phone OTP data from the database
                 otp_model = await self.otp_repo.delete_obj_related_by_number(
                     session=session,
@@ -210,11 +174,13 @@ class AuthService:
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="User not found",
                     )
+                return profile_data, user_data
 
-                # Commit the session changes
-                await session.commit()
+            profile_data, user_data = await run_transaction(
+                self.sessionmaker, _consume_otp
+            )
 
-                # Validate and return profile data
+            # Validate and return profile data
             return ProfileWithUserIdModel(
                 user_id=user_data.id,
                 profile=ProfileModel.model_validate(profile_data),
@@ -271,42 +237,3 @@ class AuthService:
     #             session=session, p_model=verifier_body, obj_id=obj_id
     #         )
     #         return True
-
-    async def create_profile_txn(self, phone_number: str, session: AsyncSession):
-        logger.debug(
-            "Starting profile creation transaction for phone number: %s", phone_number
-        )
-
-        # create a profile entity
-        db_profile = await self.profile_repo.create_obj(
-            session=session,
-            p_model=ProfileCreate(
-                phone_number=phone_number,
-            ),
-        )
-        logger.debug("Profile created with ID: %s", db_profile.id)
-
-        # create a user entity
-        db_user = await self.user_repo.create_obj(
-            session=session,
-            p_model=UserCreate(
-                profile_id=db_profile.id,
-                user_type=UserType.USER,
-                is_active=False,
-                phone_lock=False,
-            ),
-        )
-        logger.debug("User created with ID: %s", db_user.id)
-
-        # create a default notification preference
-        await self.notification_pref_repo.create_default_preference(
-            session=session, user_id=db_user.id
-        )
-        logger.debug(
-            "Default notification preference created for user ID: %s", db_user.id
-        )
-
-        await session.flush()
-        logger.debug("Session flushed for phone number: %s", phone_number)
-
-        return ProfileModel.model_validate(db_profile)
@@ -16,9 +16,9 @@ logger = logging.getLogger(__name__)
 
 
 class DeviceHandler:
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, device_service: DeviceService) -> None:
         self.name = name
-        self.device_service = DeviceService()
+        self.device_service = device_service
         self.router = APIRouter()
 
         self.router.add_api_route(
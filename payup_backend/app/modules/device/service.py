@@ -1,14 +1,15 @@
 import logging
 from uuid import UUID
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from payup_backend.app.cockroach_sql.dao.device_dao import DeviceRepo
+from payup_backend.app.cockroach_sql.transaction import run_transaction
 from payup_backend.app.modules.device.model import (
     DeviceListResponse,
     DeviceRegistrationRequest,
     DeviceRegistrationResponse,
 )
-from ...cockroach_sql.database import database
 
 logger = logging.getLogger(__name__)
 
@@ -18,16 +19,16 @@ class DeviceService:
     The class methods interact with multiple services to facilitate device endpoints.
     """
 
-    def __init__(self):
+    def __init__(self, sessionmaker: async_sessionmaker, device_repo: DeviceRepo):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.sessionmaker = database.get_session()
+        self.sessionmaker = sessionmaker
 
-        self._repo = DeviceRepo()
+        self._repo = device_repo
 
     async def register_device(
         self, device: DeviceRegistrationRequest, user_id: UUID
@@ -39,36 +40,34 @@ class DeviceService:
             device {DeviceRegistrationRequest} -- The device's registration request.
         """
         try:
-            # First transaction to commit the deletion
-            async with self.sessionmaker() as session:
-                async with session.begin():
-                    await self._repo.delete_device_for_all_users(
-                        session=session, device_id=device.device_id
-                    )
 
-                    await session.commit()
+            async def _release_device(session: AsyncSession):
+                await self._repo.delete_device_for_all_users(
+                    session=session, device_id=device.device_id
+                )
 
-            # Second transaction for the rest of the operations
-            async with self.sessionmaker() as session:
-                async with session.begin():
-                    user_devices = await self._repo.get_devices(
-                        session=session, user_id=user_id
-                    )
+            async def _register_device(session: AsyncSession):
+                user_devices = await self._repo.get_devices(
+                    session=session, user_id=user_id
+                )
 
-                    if len(user_devices) >= 2:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="User already has 2 devices registered",
-                        )
+                if len(user_devices) >= 2:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="User already has 2 devices registered",
+                    )
 
-                    device.user_id = user_id
+                device.user_id = user_id
 
-                    await self._repo.create_device(
-                        session=session,
-                        d_model=device,
-                    )
+                await self._repo.create_device(
+                    session=session,
+                    d_model=device,
+                )
 
-                    await session.commit()
+            # First transaction to commit the deletion
+            await run_transaction(self.sessionmaker, _release_device)
+            # Second transaction for the rest of the operations
+            await run_transaction(self.sessionmaker, _register_device)
 
             return DeviceRegistrationResponse(message="Device registered successfully")
         except HTTPException as e:
@@ -119,7 +118,8 @@ class DeviceService:
             device {DeviceDeleteRequest} -- The device's delete request.
         """
         try:
-            async with self.sessionmaker() as session:
+
+            async def _delete_device(session: AsyncSession):
                 device = await self._repo.delete_device_for_user(
                     session=session, device_id=device_id, user_id=user_id
                 )
@@ -129,7 +129,8 @@ class DeviceService:
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="No device found",
                     )
-                await session.commit()
+
+            await run_transaction(self.sessionmaker, _delete_device)
 
             return DeviceRegistrationResponse(message="Device deleted successfully")
         except HTTPException as e:
@@ -148,11 +149,13 @@ class DeviceService:
             user_id {UUID} -- The user's unique ID.
         """
         try:
-            async with self.sessionmaker() as session:
+
+            async def _delete_devices(session: AsyncSession):
                 await self._repo.delete_devices_for_user(
                     session=session, user_id=user_id
                 )
-                await session.commit()
+
+            await run_transaction(self.sessionmaker, _delete_devices)
 
             return DeviceRegistrationResponse(
                 message="All devices deleted successfully"
@@ -176,15 +179,17 @@ class DeviceService:
             user_id {UUID} -- The user's unique ID.
         """
         try:
-            async with self.sessionmaker() as session:
+
+            async def _touch_device(session: AsyncSession):
                 await self._repo.update_last_used(
                     session=session, device_id=device_id, user_id=user_id
                 )
-                await session.commit()
 
-                return DeviceRegistrationResponse(
-                    message="Device last used updated successfully"
-                )
+            await run_transaction(self.sessionmaker, _touch_device)
+
+            return DeviceRegistrationResponse(
+                message="Device last used updated successfully"
+            )
         except HTTPException as e:
             raise e
         except Exception as err:
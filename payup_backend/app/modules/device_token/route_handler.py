@@ -15,9 +15,9 @@ logger = logging.getLogger(__name__)
 
 
 class DeviceTokenHandler:
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, device_token_service: DeviceTokenService) -> None:
         self.name = name
-        self.device_token_service = DeviceTokenService()
+        self.device_token_service = device_token_service
         self.router = APIRouter()
 
         self.router.add_api_route(
@@ -1,5 +1,7 @@
 import logging
 
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
 from payup_backend.app.cockroach_sql.dao.device_token_dao import DeviceTokenRepo
 from payup_backend.app.modules.device_token.model import (
     DeviceTokenCreateRequest,
@@ -7,7 +9,6 @@ from payup_backend.app.modules.device_token.model import (
     DeviceTokenUpdateRequest,
     DeviceTokenUpdateResponse,
 )
-from ...cockroach_sql.database import database
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +18,18 @@ class DeviceTokenService:
     The class methods interact with multiple services to facilitate device token endpoints.
     """
 
-    def __init__(self):
+    def __init__(
+        self, sessionmaker: async_sessionmaker, device_token_repo: DeviceTokenRepo
+    ):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.sessionmaker = database.get_session()
+        self.sessionmaker = sessionmaker
 
-        self._repo = DeviceTokenRepo()
+        self._repo = device_token_repo
 
     async def create_device_token(
         self, device_token: DeviceTokenCreateRequest
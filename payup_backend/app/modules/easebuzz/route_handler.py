@@ -9,9 +9,9 @@ logger = logging.getLogger(__name__)
 
 
 class EasebuzzHandler:
-    def __init__(self, name: str):
+    def __init__(self, name: str, easebuzz_service: EasebuzzService):
         self.name = name
-        self.easebuzz_service = EasebuzzService()
+        self.easebuzz_service = easebuzz_service
         self.router = APIRouter()
 
         # Health-check route
@@ -6,7 +6,7 @@ from fastapi import HTTPException, status
 import requests
 
 from payup_backend.app.cockroach_sql.dao.profile_dao import ProfileRepo
-from payup_backend.app.cockroach_sql.database import database
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from .model import InitiatePaymentResponse
 import os
 import uuid
@@ -92,6 +92,13 @@ class EasebuzzService:
     Handles easebuzz-related operations such as fetching access token.
     """
 
+    def __init__(self, sessionmaker: async_sessionmaker, profile_repo: ProfileRepo):
+        """
+        Wire the shared sessionmaker and repositories built by the app container.
+        """
+        self.sessionmaker = sessionmaker
+        self.profile_repo = profile_repo
+
     async def initiate_payment(
         self, token_user, amount, productinfo, payment_mode
     ) -> InitiatePaymentResponse:
@@ -106,10 +113,6 @@ class EasebuzzService:
             The response from easebuzz.
         """
 
-        self.sessionmaker = database.get_session()
-
-        self.profile_repo = ProfileRepo()
-
         try:
             async with self.sessionmaker() as session:
                 async with session.begin():
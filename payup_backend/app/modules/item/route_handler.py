@@ -18,9 +18,9 @@ logging.getLogger("twilio.http_client").setLevel(logging.WARNING)
 
 class ItemHandler:
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, item_service: ItemService):
         self.name = name
-        self.item_service = ItemService()
+        self.item_service = item_service
         self.router = APIRouter()
 
         self.router.add_api_route(
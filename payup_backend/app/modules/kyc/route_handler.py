@@ -26,10 +26,12 @@ logger = logging.getLogger(__name__)
 
 
 class KycHandler:
-    def __init__(self, name: str):
+    def __init__(
+        self, name: str, kyc_service: KycService, profile_service: ProfileService
+    ):
         self.name = name
-        self.kyc_service = KycService()
-        self.profile_service = ProfileService()
+        self.kyc_service = kyc_service
+        self.profile_service = profile_service
 
         self.router = APIRouter()
 
@@ -4,6 +4,7 @@ import logging
 from uuid import UUID
 from fastapi import HTTPException, status
 from typing import Union
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from payup_backend.app.config.errors import NotFoundError
 from payup_backend.app.helperClass.verifications.kyc_pan.attestr.attestr import Attestr
 from payup_backend.app.helperClass.verifications.kyc_pan.attestr.models import (
@@ -27,8 +28,8 @@ from ...cockroach_sql.dao.kyc_lookup_dao import KycLookupRepo
 from ...cockroach_sql.dao.kyc_user_dao import UserKycRelationRepo
 from ...cockroach_sql.dao.profile_dao import ProfileRepo
 from ...cockroach_sql.dao.user_dao import UserRepo
-from ...cockroach_sql.database import database
 from ...cockroach_sql.db_enums import KycType
+from ...cockroach_sql.transaction import run_transaction
 from ...config.constants import get_settings
 from .pan.pan_model import (
     AadhaarVerifyRequestSchema,
@@ -36,6 +37,9 @@ from .pan.pan_model import (
 )
 from ..profile.model import ProfileUpdate, Profile as ProfileResponse, ProfileWithUserId
 from ...helperClass.verifications.kyc_pan.sandbox.sandbox import Sandbox
+from ...helperClass.verifications.kyc_pan.verification_cache import (
+    VerificationCache,
+)
 
 
 # from ...dependency import authentication
@@ -51,25 +55,35 @@ class KycService:
     The class methods interact with multiple services to facilitate auth endpoints.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        kyc_repo: KycEntityRepo,
+        lookup_repo: KycLookupRepo,
+        relational_repo: UserKycRelationRepo,
+        profile_repo: ProfileRepo,
+        user_repo: UserRepo,
+        sandbox_client: Sandbox,
+        attestr_client: Attestr,
+        verification_cache: VerificationCache,
+    ):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.sessionmaker = database.get_session()
+        self.sessionmaker = sessionmaker
 
-        self._repo = KycEntityRepo()
-        self.lookup_repo = KycLookupRepo()
-        self.relational_repo = UserKycRelationRepo()
-        self.profile_repo = ProfileRepo()
-        self.user_repo = UserRepo()
+        self._repo = kyc_repo
+        self.lookup_repo = lookup_repo
+        self.relational_repo = relational_repo
+        self.profile_repo = profile_repo
+        self.user_repo = user_repo
 
-        self.sandbox_client = Sandbox(
-            constants.SANDBOX.API_KEY, constants.SANDBOX.SECRET_KEY
-        )
-        self.attestr_client = Attestr()
+        self.sandbox_client = sandbox_client
+        self.attestr_client = attestr_client
+        self.verification_cache = verification_cache
 
     # async def pan_verify(
     #     self, profile_id: UUID, pan_id: str, name: str, consent: str, dob: str
@@ -233,7 +247,7 @@ class KycService:
                     birthOrIncorporatedDate=verification.Data.DOB,
                 )
 
-                async with self.sessionmaker() as session:
+                async def _attach_aadhaar(session: AsyncSession):
                     kyc_lookup_list = await self.lookup_repo.get_obj_by_filter(
                         session=session,
                         col_filters=[
@@ -246,10 +260,8 @@ class KycService:
                     )
                     if len(kyc_lookup_list) == 0 and p_model.entity_id:
                         logger.info("no entry found for %s", p_model.entity_id)
-                        kyc = await self._repo.create_obj(
-                            session=session, p_model=p_model
-                        )
-                        kyc_lookup = await self.lookup_repo.create_obj(
+                        await self._repo.create_obj(session=session, p_model=p_model)
+                        await self.lookup_repo.create_obj(
                             session=session,
                             p_model=KycLookupCreate(
                                 entity_id=p_model.entity_id,
@@ -259,7 +271,6 @@ class KycService:
                     else:
                         logger.info("entry found for %s", p_model.entity_id)
                         logger.info("# of records found %s", len(kyc_lookup_list))
-                        kyc_lookup = kyc_lookup_list[0]
 
                     user_list = await self.user_repo.get_obj_by_filter(
                         session=session,
@@ -273,7 +284,7 @@ class KycService:
                             name=__name__, detail=BaseResponse(message="User not found")
                         )
 
-                    kyc_relation = await self.relational_repo.get_or_create_obj(
+                    await self.relational_repo.get_or_create_obj(
                         session=session,
                         user_id=user_list.id,
                     )
@@ -290,7 +301,11 @@ class KycService:
                             (self.profile_repo.repo_schema.kyc_pan, True),
                         ],
                     )
-                    await session.commit()
+                    return user_list, profile
+
+                user_list, profile = await run_transaction(
+                    self.sessionmaker, _attach_aadhaar
+                )
 
                 logger.info(profile)
                 return ProfileWithUserId(user_id=user_list.id, profile=profile)
@@ -309,7 +324,8 @@ class KycService:
         """validate an access token"""
         try:
             logger.info("attaching: %s", kyc_data.entity_type.name)
-            async with self.sessionmaker() as session:
+
+            async def _attach_pan(session: AsyncSession):
                 kyc_lookup_list = await self.lookup_repo.get_obj_by_filter(
                     session=session,
                     col_filters=[
@@ -342,7 +358,7 @@ class KycService:
                         name=__name__, detail=BaseResponse(message="User not found")
                     )
                 logger.info("%s", user_list)
-                kyc_relation = await self.relational_repo.get_or_create_obj(
+                await self.relational_repo.get_or_create_obj(
                     session=session,
                     kyc_id=kyc_data.internal_id,
                     user_id=user_list.id,
@@ -352,7 +368,9 @@ class KycService:
                     obj_id=profile_id,
                     p_model=ProfileUpdate(kyc_pan=True),
                 )
-                await session.commit()
+                return user_list, profile
+
+            user_list, profile = await run_transaction(self.sessionmaker, _attach_pan)
 
             return ProfileWithUserId(user_id=user_list.id, profile=profile)
 
@@ -374,7 +392,10 @@ class KycService:
             user_name,
         )
 
-        verification = await self.attestr_client.verifyUpi(upi_id=req_body.upi_id)
+        verification = self.verification_cache.get_upi(req_body.upi_id)
+        if verification is None:
+            verification = await self.attestr_client.verifyUpi(upi_id=req_body.upi_id)
+            self.verification_cache.put_upi(req_body.upi_id, verification)
 
         logger.info("Verification result from sandbox: %s", verification)
 
@@ -449,9 +470,12 @@ class KycService:
     async def verify_bank(self, account_number: str, ifsc: str) -> BankVerifyResponse:
         logger.info("checking: BANK %s, %s", account_number, ifsc)
 
-        verification = await self.attestr_client.verifyBank(
-            account_number=account_number, ifsc=ifsc
-        )
+        verification = self.verification_cache.get_bank(account_number, ifsc)
+        if verification is None:
+            verification = await self.attestr_client.verifyBank(
+                account_number=account_number, ifsc=ifsc
+            )
+            self.verification_cache.put_bank(account_number, ifsc, verification)
 
         logger.info("Verification result from sandbox: %s", verification)
 
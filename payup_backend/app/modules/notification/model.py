@@ -1,11 +1,33 @@
+from enum import Enum, IntFlag
 from typing import Optional, List
 from uuid import UUID, uuid4
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
+class NotificationFlag(IntFlag):
+    """one bit per app notification type, as stored in the preferences bitmask"""
+
+    TRANSACTIONS = 1
+    PROMOTIONS = 2
+
+
 class NotificationSettings(BaseModel):
     transactions: bool = Field(default=True)
+    promotions: bool = Field(default=False)
+
+    def to_flags(self) -> NotificationFlag:
+        flags = NotificationFlag(0)
+        for flag in NotificationFlag:
+            if getattr(self, flag.name.lower()):
+                flags |= flag
+        return flags
+
+    @classmethod
+    def from_flags(cls, flags: int) -> "NotificationSettings":
+        return cls(
+            **{flag.name.lower(): bool(flags & flag) for flag in NotificationFlag}
+        )
 
 
 class Preferences(BaseModel):
@@ -13,6 +35,13 @@ class Preferences(BaseModel):
         default_factory=NotificationSettings
     )
 
+    def to_flags(self) -> NotificationFlag:
+        return self.app_notifications.to_flags()
+
+    @classmethod
+    def from_flags(cls, flags: int):
+        return cls(app_notifications=NotificationSettings.from_flags(flags))
+
 
 class NotificationPreferenceRequest(Preferences):
     pass
@@ -22,12 +51,65 @@ class NotificationPreferenceResponse(Preferences):
     pass
 
 
+class NotificationStatus(str, Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    RETRYING = "retrying"
+    FAILED = "failed"
+
+
 class NotificationModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    notification_id: UUID = Field(default_factory=uuid4)
     user_id: UUID
     title: str
     message: str
     type: str
     method: str
-    status: Optional[str] = Field(default="sent")
+    status: Optional[str] = Field(default=NotificationStatus.PENDING.value)
+    read_at: Optional[datetime] = None
     created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+
+class NotificationInboxResponse(BaseModel):
+    notifications: List[NotificationModel]
+    # pass back as `cursor` for the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
+class MarkReadRequest(BaseModel):
+    notification_ids: List[UUID] = Field(min_length=1, max_length=100)
+
+
+class MarkReadResponse(BaseModel):
+    marked: int
+
+
+class UnreadCountResponse(BaseModel):
+    unread: int
+
+
+class NotificationOutboxModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    outbox_id: UUID = Field(default_factory=uuid4)
+    notification_id: UUID
+    user_id: UUID
+    title: str
+    message: str
+    push_tokens: Optional[List[str]] = None
+    attempts: int = 0
+    available_at: datetime
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+
+class PushReceiptModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    # expo push ticket id, its receipt tells whether the token is still alive
+    ticket_id: str
+    token: str
+    check_after: datetime
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
@@ -1,9 +1,13 @@
 import logging
-from fastapi import APIRouter, status, Depends
-from typing import Annotated, List
+from fastapi import APIRouter, status, Depends, Query
+from typing import Annotated, List, Optional
 from .model import (
+    MarkReadRequest,
+    MarkReadResponse,
+    NotificationInboxResponse,
     NotificationPreferenceRequest,
     NotificationPreferenceResponse,
+    UnreadCountResponse,
 )
 from payup_backend.app.modules.notification.service import NotificationService
 from ...dependency.authentication import UserClaim, JWTAuth
@@ -12,9 +16,9 @@ logger = logging.getLogger(__name__)
 
 
 class NotificationHandler:
-    def __init__(self, name: str):
+    def __init__(self, name: str, notification_service: NotificationService):
         self.name = name
-        self.notification_service = NotificationService()
+        self.notification_service = notification_service
         self.router = APIRouter()
 
         self.router.add_api_route(
@@ -47,6 +51,30 @@ class NotificationHandler:
             response_model_exclude_none=True,
         )
 
+        self.router.add_api_route(
+            "/inbox",
+            endpoint=self.get_inbox_endpoint,
+            response_model=NotificationInboxResponse,
+            status_code=status.HTTP_200_OK,
+            methods=["GET"],
+        )
+
+        self.router.add_api_route(
+            "/inbox/read",
+            endpoint=self.mark_read_endpoint,
+            response_model=MarkReadResponse,
+            status_code=status.HTTP_200_OK,
+            methods=["POST"],
+        )
+
+        self.router.add_api_route(
+            "/unread-count",
+            endpoint=self.get_unread_count_endpoint,
+            response_model=UnreadCountResponse,
+            status_code=status.HTTP_200_OK,
+            methods=["GET"],
+        )
+
     def hello(self):
         logger.debug("Hello : %s", self.name)
         return {"Hello": self.name}
@@ -78,4 +106,30 @@ class NotificationHandler:
         await self.notification_service.send_push_notification(
             token_user.user_id, title, message, notification_type
         )
-        return {"status": "Notification sent"}
+        return {"status": "Notification queued"}
+
+    async def get_inbox_endpoint(
+        self,
+        token_user: Annotated[UserClaim, Depends(JWTAuth.get_current_user)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        cursor: Optional[str] = None,
+        unread: bool = False,
+    ) -> NotificationInboxResponse:
+        return await self.notification_service.get_inbox(
+            token_user.user_id, limit=limit, cursor=cursor, unread_only=unread
+        )
+
+    async def mark_read_endpoint(
+        self,
+        req_body: MarkReadRequest,
+        token_user: Annotated[UserClaim, Depends(JWTAuth.get_current_user)],
+    ) -> MarkReadResponse:
+        return await self.notification_service.mark_read(
+            token_user.user_id, req_body.notification_ids
+        )
+
+    async def get_unread_count_endpoint(
+        self,
+        token_user: Annotated[UserClaim, Depends(JWTAuth.get_current_user)],
+    ) -> UnreadCountResponse:
+        return await self.notification_service.get_unread_count(token_user.user_id)
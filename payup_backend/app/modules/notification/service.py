@@ -1,18 +1,29 @@
+from datetime import datetime
 import logging
+from typing import List, Optional
 from uuid import UUID
+import pytz
 from fastapi import HTTPException, status
-from payup_backend.app.cockroach_sql.database import database
-from payup_backend.app.cockroach_sql.dao.device_dao import DeviceRepo
-from payup_backend.app.cockroach_sql.dao.device_token_dao import DeviceTokenRepo
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from payup_backend.app.modules.notification.model import (
+    MarkReadResponse,
+    NotificationInboxResponse,
     NotificationModel,
+    NotificationOutboxModel,
     NotificationPreferenceResponse,
+    NotificationStatus,
+    UnreadCountResponse,
 )
 from ...cockroach_sql.dao.notification_dao import (
+    NotificationCounterRepository,
+    NotificationOutboxRepository,
     NotificationPreferenceRepository,
     NotificationRepository,
 )
-from ...dependency.expo_notification import ExpoNotification
+from ...cockroach_sql.transaction import run_transaction
+from ...dependency.preference_cache import PreferenceCache
+from ...dependency.unread_cache import UnreadCountCache
+from ...utils.cursor import decode_cursor, decode_timestamp, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -24,20 +35,89 @@ class NotificationService:
 
     def __init__(
         self,
+        sessionmaker: async_sessionmaker,
+        preference_repo: NotificationPreferenceRepository,
+        notification_repo: NotificationRepository,
+        outbox_repo: NotificationOutboxRepository,
+        counter_repo: NotificationCounterRepository,
+        preference_cache: PreferenceCache,
+        unread_cache: UnreadCountCache,
     ):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.sessionmaker = database.get_session()
+        self.sessionmaker = sessionmaker
 
-        self.preference_repo = NotificationPreferenceRepository()
-        self.device_repo = DeviceRepo()
-        self.token_repo = DeviceTokenRepo()
-        self.notification_repo = NotificationRepository()
-        self.expo_notification = ExpoNotification()
+        self.preference_repo = preference_repo
+        self.notification_repo = notification_repo
+        self.outbox_repo = outbox_repo
+        self.counter_repo = counter_repo
+        self.preference_cache = preference_cache
+        self.unread_cache = unread_cache
+
+    async def _load_preference(
+        self, session: AsyncSession, user_id: UUID
+    ) -> NotificationPreferenceResponse:
+        """preferences from the cache, read through to the db on a miss"""
+        preferences = self.preference_cache.get(user_id)
+        if preferences is None:
+            preferences = await self.preference_repo.get_preference_by_user(
+                session=session, user_id=user_id
+            )
+            self.preference_cache.put(user_id, preferences)
+        return preferences
+
+    async def enqueue_push_notification(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        title: str,
+        message: str,
+        notification_type: str,
+    ) -> Optional[NotificationModel]:
+        """
+        Record a notification and queue its push in the caller's transaction.
+
+        Delivery happens in the notification dispatcher once the transaction
+        commits, so the push never goes out for a rolled back event. Returns
+        None when the user opted out of `notification_type`.
+        """
+        preferences = await self._load_preference(session=session, user_id=user_id)
+
+        app_notifications = getattr(preferences, "app_notifications", None)
+        if not (app_notifications and getattr(app_notifications, notification_type)):
+            return None
+
+        current_time = datetime.now(pytz.UTC).replace(tzinfo=None)
+        notification = NotificationModel(
+            user_id=user_id,
+            title=title,
+            message=message,
+            type=notification_type,
+            method="app_notification",
+            status=NotificationStatus.PENDING.value,
+            created_at=current_time,
+            updated_at=current_time,
+        )
+        await self.notification_repo.add_notification(
+            session=session, notification=notification
+        )
+        await self.counter_repo.add_unread(session=session, counts={user_id: 1})
+        await self.outbox_repo.add_outbox(
+            session=session,
+            outbox=NotificationOutboxModel(
+                notification_id=notification.notification_id,
+                user_id=user_id,
+                title=title,
+                message=message,
+                available_at=current_time,
+                created_at=current_time,
+            ),
+        )
+        return notification
 
     async def send_push_notification(
         self,
@@ -47,63 +127,22 @@ class NotificationService:
         notification_type: str,
     ):
         """
-        Wraps a `session` call that sends a push notification.
+        Wraps a `session` call that queues a push notification.
         """
 
         try:
-            async with self.sessionmaker() as session:
-                async with session.begin():
-                    preferences = await self.preference_repo.get_preference_by_user(
-                        session=session, user_id=UUID(user_id)
-                    )
-
-                    app_notifications = getattr(preferences, "app_notifications", None)
-                    if app_notifications and getattr(
-                        app_notifications, notification_type
-                    ):
-                        devices = await self.device_repo.get_devices(
-                            session=session, user_id=UUID(user_id)
-                        )
-
-                        # Send push notification
-                        for device in devices:
-                            tokens = await self.token_repo.get_device_tokens(
-                                session=session, device_id=device.device_id
-                            )
-                            for token in tokens:
-                                if token.token_purpose == "push_notification":
-                                    # Send push notification
-                                    try:
-                                        await self.expo_notification.send_push_message(
-                                            token=token.token,
-                                            message=message,
-                                            extra={"title": title},
-                                            session=session,
-                                        )
-                                    except Exception as e:
-                                        logger.error(
-                                            "Push notification failed for device %s",
-                                            device.device_id,
-                                        )
-                                        logger.error(e)
-
-                                    logger.info(
-                                        "Push notification sent to device %s",
-                                        device.device_id,
-                                    )
-
-                        # Save notification record
-                        notification = NotificationModel(
-                            user_id=user_id,  # type: ignore
-                            title=title,
-                            message=message,
-                            type=notification_type,
-                            method="app_notification",
-                        )
-
-                        await self.notification_repo.add_notification(
-                            session=session, notification=notification
-                        )
+            notification = await run_transaction(
+                self.sessionmaker,
+                lambda session: self.enqueue_push_notification(
+                    session=session,
+                    user_id=UUID(user_id),
+                    title=title,
+                    message=message,
+                    notification_type=notification_type,
+                ),
+            )
+            if notification is not None:
+                self.unread_cache.invalidate(notification.user_id)
         except HTTPException as e:
             raise e
         except Exception as err:
@@ -115,13 +154,120 @@ class NotificationService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail_message
             ) from err
 
+    async def get_inbox(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        unread_only: bool = False,
+    ) -> NotificationInboxResponse:
+        """
+        Wraps a `session` call that reads one page of a user's notifications.
+        """
+        try:
+            before = None
+            if cursor is not None:
+                try:
+                    created_at, notification_id = decode_cursor(cursor, 2)
+                    before = (
+                        decode_timestamp(created_at),
+                        UUID(notification_id),
+                    )
+                except (TypeError, ValueError) as err:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Invalid cursor",
+                    ) from err
+
+            async with self.sessionmaker() as session:
+                # one extra row tells whether another page follows
+                notifications = await self.notification_repo.get_inbox(
+                    session=session,
+                    user_id=UUID(user_id),
+                    limit=limit + 1,
+                    before=before,
+                    unread_only=unread_only,
+                )
+                await session.commit()
+
+            next_cursor = None
+            if len(notifications) > limit:
+                notifications = notifications[:limit]
+                last = notifications[-1]
+                next_cursor = encode_cursor(last.created_at, last.notification_id)
+            return NotificationInboxResponse(
+                notifications=notifications, next_cursor=next_cursor
+            )
+        except HTTPException as e:
+            raise e
+        except Exception as err:
+            logger.error("error : %s", err)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=err.args[0]
+            ) from err
+
+    async def mark_read(
+        self, user_id: str, notification_ids: List[UUID]
+    ) -> MarkReadResponse:
+        """
+        Wraps a `session` call that marks a user's notifications read.
+        """
+        try:
+
+            async def _mark_read(session: AsyncSession) -> int:
+                marked = await self.notification_repo.mark_read(
+                    session=session,
+                    user_id=UUID(user_id),
+                    notification_ids=notification_ids,
+                )
+                await self.counter_repo.add_unread(
+                    session=session, counts={UUID(user_id): -len(marked)}
+                )
+                return len(marked)
+
+            marked = await run_transaction(self.sessionmaker, _mark_read)
+            self.unread_cache.invalidate(UUID(user_id))
+            return MarkReadResponse(marked=marked)
+        except HTTPException as e:
+            raise e
+        except Exception as err:
+            logger.error("error : %s", err)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=err.args[0]
+            ) from err
+
+    async def get_unread_count(self, user_id: str) -> UnreadCountResponse:
+        """
+        Wraps a `session` call that reads a user's unread badge count.
+        """
+        try:
+            unread = self.unread_cache.get(UUID(user_id))
+            if unread is None:
+                async with self.sessionmaker() as session:
+                    unread = await self.counter_repo.get_unread(
+                        session=session, user_id=UUID(user_id)
+                    )
+                    await session.commit()
+                self.unread_cache.put(UUID(user_id), unread)
+            return UnreadCountResponse(unread=unread)
+        except HTTPException as e:
+            raise e
+        except Exception as err:
+            logger.error("error : %s", err)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=err.args[0]
+            ) from err
+
     async def get_preference(self, user_id: str) -> NotificationPreferenceResponse:
         """
         Wraps a `session` call that gets a list of preferences for a user.
         """
         try:
+            preferences = self.preference_cache.get(UUID(user_id))
+            if preferences is not None:
+                return preferences
             async with self.sessionmaker() as session:
-                preferences = await self.preference_repo.get_preference_by_user(
+                preferences = await self._load_preference(
                     session=session, user_id=UUID(user_id)
                 )
 
@@ -148,6 +294,8 @@ class NotificationService:
                 )
 
                 await session.commit()
+            # write through so this worker serves the new value right away
+            self.preference_cache.put(UUID(user_id), preferences)
             return preferences
         except HTTPException as e:
             raise e
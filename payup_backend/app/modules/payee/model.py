@@ -1,6 +1,6 @@
 from typing import Optional
 from uuid import UUID, uuid4
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
@@ -17,8 +17,7 @@ class PayeeModel(BaseModel):
     created_at: Optional[datetime] = None  # Optional, but can be auto-set
     updated_at: Optional[datetime] = None  # Optional, but can be auto-set
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AddPayeeRequest(BaseModel):
@@ -1,29 +1,28 @@
 import logging
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import Annotated, List
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends
+from typing import Annotated, List, Optional
 
 from .model import AddPayeeRequest, PayeeModel
 from payup_backend.app.modules.payee.service import PayeeService
-from payup_backend.app.modules.kyc.service import KycService
 from ...dependency.authentication import UserClaim, JWTAuth
 
 logger = logging.getLogger(__name__)
 
 
 class PayeeHandler:
-    def __init__(self, name: str):
+    def __init__(self, name: str, payee_service: PayeeService):
         self.name = name
-        self.payee_service = PayeeService()
+        self.payee_service = payee_service
         self.router = APIRouter()
-        self.kyc_service = KycService()
 
         # Health-check route
         self.router.add_api_route(
             "/health", self.hello, methods=["GET"], tags=["health-check"]
         )
 
-        # Route to get all payees for a user
+        # Route to get a page of payees for a user, the next page's cursor
+        # comes back in the X-Next-Cursor header
         self.router.add_api_route(
             "/",
             endpoint=self.get_payees_endpoint,
@@ -58,9 +57,16 @@ class PayeeHandler:
 
     async def get_payees_endpoint(
         self,
+        response: Response,
         token_user: Annotated[UserClaim, Depends(JWTAuth.get_current_user)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        cursor: Optional[str] = None,
     ) -> List[PayeeModel]:
-        payees = await self.payee_service.get_payees(token_user.user_id)
+        payees, next_cursor = await self.payee_service.get_payees(
+            token_user.user_id, limit=limit, cursor=cursor
+        )
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
         return payees
 
     async def add_payee_endpoint(
@@ -1,12 +1,20 @@
 import logging
+from typing import List, Optional, Tuple
 from uuid import UUID
 from fastapi import HTTPException, status
-from payup_backend.app.cockroach_sql.database import database
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from payup_backend.app.cockroach_sql.dao.payee_dao import PayeeRepository
+from payup_backend.app.cockroach_sql.transaction import run_transaction
+from payup_backend.app.dependency.payee_cache import PayeeListCache
 from payup_backend.app.helperClass.verifications.kyc_pan.attestr.attestr import Attestr
 from payup_backend.app.modules import user
 from payup_backend.app.modules.kyc.service import KycService
 from payup_backend.app.modules.profile.service import ProfileService
+from payup_backend.app.utils.cursor import (
+    decode_cursor,
+    decode_timestamp,
+    encode_cursor,
+)
 from .model import AddPayeeRequest, PayeeModel
 from rapidfuzz import fuzz
 
@@ -18,15 +26,24 @@ class PayeeService:
     Handles payee-related operations such as adding, deleting, and fetching payees.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        payee_repo: PayeeRepository,
+        profile_service: ProfileService,
+        kyc_service: KycService,
+        attestr_client: Attestr,
+        payee_cache: PayeeListCache,
+    ):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
         """
-        self.sessionmaker = database.get_session()
-        self.payee_repo = PayeeRepository()
-        self.profile_service = ProfileService()
-        self.kyc_service = KycService()
-        self.attestr_client = Attestr()
+        self.sessionmaker = sessionmaker
+        self.payee_repo = payee_repo
+        self.profile_service = profile_service
+        self.kyc_service = kyc_service
+        self.attestr_client = attestr_client
+        self.payee_cache = payee_cache
 
     async def add_payee(
         self, user_id: str, payee: AddPayeeRequest, profile_id: str
@@ -92,71 +109,68 @@ class PayeeService:
         #         return pan_verification
 
         try:
-            async with self.sessionmaker() as session:
-                async with session.begin():
-
-                    profile = await self.profile_service.get_user_profile(profile_id)
-
-                    if payee.upi_id:
-                        upi_verification = await self.kyc_service.verify_upi(
-                            payee, profile.name
-                        )
-
-                        ratio = fuzz.ratio(
-                            upi_verification.name.lower(), profile.name.lower()
-                        )
-
-                        logger.info(
-                            "UPI Name to User Name verification: %s, user_name: %s, ratio: %s",
-                            upi_verification.name,
-                            profile.name,
-                            ratio,
-                        )
-
-                        if ratio > 80:
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="You can only transfer to UPI ID which is not registered in your name or your company's name or related parties",
-                            )
-
-                        name = upi_verification.name
-                        payee.bank_name = upi_verification.bank
-
-                    elif payee.account_number:
-                        bank_verification = await self.kyc_service.verify_bank(
-                            payee.account_number, payee.ifsc
-                        )
-
-                        ratio = fuzz.ratio(
-                            bank_verification.name.lower(), profile.name.lower()
-                        )
-
-                        logger.info(
-                            "Bank Name to User Name verification: %s, user_name: %s, ratio: %s",
-                            bank_verification.name,
-                            profile.name,
-                            ratio,
-                        )
-
-                        if ratio > 80:
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="You can only transfer to Bank Account which is not registered in your name or your company's name or related parties",
-                            )
-
-                        name = bank_verification.name
-                        payee.bank_name = bank_verification.ifsc.bank
-                        payee.ifsc = bank_verification.ifsc.ifsc
-
-                    new_payee = await self.payee_repo.add_payee(
-                        session=session,
-                        user_id=UUID(user_id),
-                        payee=payee,
-                        name=name,
-                        profile_id=UUID(profile_id),
+            profile = await self.profile_service.get_user_profile(profile_id)
+
+            if payee.upi_id:
+                upi_verification = await self.kyc_service.verify_upi(
+                    payee, profile.name
+                )
+
+                ratio = fuzz.ratio(upi_verification.name.lower(), profile.name.lower())
+
+                logger.info(
+                    "UPI Name to User Name verification: %s, user_name: %s, ratio: %s",
+                    upi_verification.name,
+                    profile.name,
+                    ratio,
+                )
+
+                if ratio > 80:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="You can only transfer to UPI ID which is not registered in your name or your company's name or related parties",
+                    )
+
+                name = upi_verification.name
+                payee.bank_name = upi_verification.bank
+
+            elif payee.account_number:
+                bank_verification = await self.kyc_service.verify_bank(
+                    payee.account_number, payee.ifsc
+                )
+
+                ratio = fuzz.ratio(bank_verification.name.lower(), profile.name.lower())
+
+                logger.info(
+                    "Bank Name to User Name verification: %s, user_name: %s, ratio: %s",
+                    bank_verification.name,
+                    profile.name,
+                    ratio,
+                )
+
+                if ratio > 80:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="You can only transfer to Bank Account which is not registered in your name or your company's name or related parties",
                     )
 
-                    await session.commit()
+                name = bank_verification.name
+                payee.bank_name = bank_verification.ifsc.bank
+                payee.ifsc = bank_verification.ifsc.ifsc
+
+            # vendor verification stays outside the transaction so a retry
+            # only repeats the insert
+            async def _insert_payee(session: AsyncSession):
+                return await self.payee_repo.add_payee(
+                    session=session,
+                    user_id=UUID(user_id),
+                    payee=payee,
+                    name=name,
+                    profile_id=UUID(profile_id),
+                )
+
+            new_payee = await run_transaction(self.sessionmaker, _insert_payee)
+            self.payee_cache.invalidate(UUID(user_id))
             return new_payee
         except HTTPException as e:
             raise e
@@ -167,24 +181,60 @@ class PayeeService:
                 detail="Could not add payee.",
             ) from err
 
-    async def get_payees(self, user_id: str):
+    async def get_payees(
+        self, user_id: str, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[PayeeModel], Optional[str]]:
         """
-        Fetch all payees associated with a user.
+        Fetch one page of the payees associated with a user.
 
         Args:
             user_id: The UUID of the user.
+            limit: The page size.
+            cursor: The cursor returned with the previous page, None for the first.
 
         Returns:
-            A list of PayeeModel objects representing the user's payees.
+            The page of PayeeModel objects and the cursor of the next page, None
+            on the last page. First pages are served from the payee cache.
         """
         try:
+            after = None
+            if cursor is not None:
+                try:
+                    last_paid, payee_id = decode_cursor(cursor, 2)
+                    after = (
+                        (
+                            decode_timestamp(last_paid)
+                            if last_paid is not None
+                            else None
+                        ),
+                        UUID(payee_id),
+                    )
+                except (TypeError, ValueError) as err:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Invalid cursor",
+                    ) from err
+            else:
+                cached = self.payee_cache.get(UUID(user_id), limit)
+                if cached is not None:
+                    return cached
+
             async with self.sessionmaker() as session:
+                # one extra row tells whether another page follows
                 payees = await self.payee_repo.get_payees_by_user(
-                    session=session, user_id=UUID(user_id)
+                    session=session, user_id=UUID(user_id), limit=limit + 1, after=after
                 )
 
                 await session.commit()
-            return payees
+
+            next_cursor = None
+            if len(payees) > limit:
+                payees = payees[:limit]
+                last = payees[-1]
+                next_cursor = encode_cursor(last.last_paid, last.payee_id)
+            if after is None:
+                self.payee_cache.put(UUID(user_id), limit, payees, next_cursor)
+            return payees, next_cursor
         except HTTPException as e:
             raise e
         except Exception as err:
@@ -206,13 +256,14 @@ class PayeeService:
             None
         """
         try:
-            async with self.sessionmaker() as session:
-                async with session.begin():
-                    await self.payee_repo.delete_payee(
-                        session=session, user_id=user_id, payee_id=payee_id, profile_id=profile_id  # type: ignore
-                    )
 
-                    await session.commit()
+            async def _delete_payee(session: AsyncSession):
+                await self.payee_repo.delete_payee(
+                    session=session, user_id=user_id, payee_id=payee_id, profile_id=profile_id  # type: ignore
+                )
+
+            await run_transaction(self.sessionmaker, _delete_payee)
+            self.payee_cache.invalidate(UUID(user_id))
         except HTTPException as e:
             raise e
         except Exception as err:
@@ -21,9 +21,9 @@ logger = logging.getLogger(__name__)
 
 
 class ProfileHandler:
-    def __init__(self, name: str):
+    def __init__(self, name: str, profile_service: ProfileService):
         self.name = name
-        self.profile_service = ProfileService()
+        self.profile_service = profile_service
 
         self.router = APIRouter()
 
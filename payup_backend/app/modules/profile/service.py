@@ -2,13 +2,11 @@
 
 import logging
 from uuid import UUID
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
 from .model import ProfileDeleteResponse, ProfileUpdate, ProfileUpdateRequest
-from ...cockroach_sql.database import database
 from ...cockroach_sql.dao.profile_dao import ProfileRepo
 
 
@@ -20,16 +18,16 @@ class ProfileService:
     The class methods interact with multiple services to facilitate auth endpoints.
     """
 
-    def __init__(self):
+    def __init__(self, sessionmaker: async_sessionmaker, profile_repo: ProfileRepo):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.sessionmaker = database.get_session()
+        self.sessionmaker = sessionmaker
 
-        self._repo = ProfileRepo()
+        self._repo = profile_repo
 
     async def get_user_profile(self, obj_id: UUID):
         """
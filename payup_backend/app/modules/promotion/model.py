@@ -1,4 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
@@ -14,3 +17,28 @@ class Promotion(BaseModel):
 
 class PromotionResponse(BaseModel):
     promotions: list[Promotion]
+
+
+class CampaignStatus(str, Enum):
+    RUNNING = "running"
+    # claimed by a sender until lease_until
+    SENDING = "sending"
+    COMPLETED = "completed"
+
+
+class PromotionCampaign(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    campaign_id: UUID = Field(default_factory=uuid4)
+    promotion_id: int
+    title: str
+    message: str
+    status: str = Field(default=CampaignStatus.RUNNING.value)
+    # checkpoint, every user up to and including this id has been sent to
+    last_user_id: Optional[UUID] = None
+    users_notified: int = 0
+    pushes_sent: int = 0
+    lease_until: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
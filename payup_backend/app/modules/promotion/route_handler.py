@@ -16,8 +16,8 @@ def hello():
 
 
 class PromotionHandler:
-    def __init__(self):
-        self.promotion_service = PromotionService()
+    def __init__(self, promotion_service: PromotionService):
+        self.promotion_service = promotion_service
 
         self.router = APIRouter()
 
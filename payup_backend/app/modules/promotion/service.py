@@ -1,27 +1,22 @@
 import logging
 from fastapi import HTTPException, status
 from ...cockroach_sql.dao.promotion_dao import PromotionRepo
-from ...cockroach_sql.database import database
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 logger = logging.getLogger(__name__)
 
 
 class PromotionService:
-    def __init__(self):
+    def __init__(self, sessionmaker: async_sessionmaker, promotion_repo: PromotionRepo):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.engine = database.engine
-        self.sessionmaker = sessionmaker(
-            bind=self.engine, class_=AsyncSession, expire_on_commit=False
-        )
+        self.sessionmaker = sessionmaker
 
-        self._repo = PromotionRepo()
+        self._repo = promotion_repo
 
     async def get_promotion(self):
         try:
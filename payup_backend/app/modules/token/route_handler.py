@@ -15,9 +15,9 @@ logger = logging.getLogger(__name__)
 
 
 class TokenHandler:
-    def __init__(self, name: str):
+    def __init__(self, name: str, token_service: TokenService):
         self.name = name
-        self.token_service = TokenService()
+        self.token_service = token_service
 
         self.router = APIRouter()
 
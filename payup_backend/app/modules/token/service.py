@@ -5,14 +5,12 @@ from datetime import datetime, timedelta
 from uuid import UUID, uuid4
 import pytz
 
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from fastapi import HTTPException, status
 
 from payup_backend.app.cockroach_sql.schemas import RefreshTokenEntity
 
-from ...cockroach_sql.database import database
 from ...config.constants import get_settings
 from .model import (
     TokenBody,
@@ -25,8 +23,10 @@ from .model import (
 from ...models.py_models import BaseResponse
 from ...config.errors import NotFoundError
 from ...dependency import authentication
+from ...dependency.token_blacklist import AccessTokenBlacklistCache
 from ...cockroach_sql.dao.tokens_dao import RefreshTokenRepo, AccessTokenBlacklistRepo
 from ...cockroach_sql.dao.user_dao import UserRepo
+from ...cockroach_sql.transaction import run_transaction
 
 
 logger = logging.getLogger(__name__)
@@ -39,19 +39,26 @@ class TokenService:
     The class methods interact with multiple services to facilitate auth endpoints.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        refresh_token_repo: RefreshTokenRepo,
+        access_token_repo: AccessTokenBlacklistRepo,
+        user_repo: UserRepo,
+        blacklist_cache: AccessTokenBlacklistCache,
+    ):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.engine = database.engine
-        self.sessionmaker = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.sessionmaker = sessionmaker
 
-        self.refresh_token_repo = RefreshTokenRepo()
-        self.access_token_repo = AccessTokenBlacklistRepo()
-        self.user_repo = UserRepo()
+        self.refresh_token_repo = refresh_token_repo
+        self.access_token_repo = access_token_repo
+        self.blacklist_cache = blacklist_cache
+        self.user_repo = user_repo
         self.jwt_service = authentication.JWTAuth()
 
     async def create_new_tokens(self, profile_id: UUID, user_id: UUID) -> TokenBody:
@@ -63,7 +70,7 @@ class TokenService:
                 now + timedelta(minutes=constants.JT.REFRESH_TOKEN_DURATION)
             ).replace(tzinfo=None)
 
-            async with self.sessionmaker() as session:
+            async def _create_refresh_token(session: AsyncSession):
                 # query for token number if already exist get if, else create token entity in db
                 # get user
                 p_user = await self.user_repo.get_obj_by_filter(
@@ -83,7 +90,9 @@ class TokenService:
                     ),
                 )
                 logger.debug("tokens : %s", rt_model)
-                await session.commit()
+                return rt_model
+
+            rt_model = await run_transaction(self.sessionmaker, _create_refresh_token)
 
             return await self.get_token_strings(
                 profile_id=profile_id, rt_model=rt_model, user_id=user_id
@@ -124,7 +133,7 @@ class TokenService:
             ).replace(tzinfo=None)
             p_model = RefreshTokenUpdate(expires_on=future_time, jti=rt_jti)
 
-            async with self.sessionmaker() as session:
+            async def _rotate_refresh_token(session: AsyncSession):
                 # query for token number if already exist get if, else create token entity in db
                 db_users = await self.user_repo.get_obj_by_filter(
                     session=session,
@@ -137,7 +146,7 @@ class TokenService:
                 )
 
                 if db_users is None:
-                    return TokenBody(refresh_token="", access_token="")
+                    return None
 
                 rt_model = await self.refresh_token_repo.update_obj(
                     session=session,
@@ -149,7 +158,11 @@ class TokenService:
                     ],
                 )
                 logger.debug("tokens : %s", rt_model)
-                await session.commit()
+                return rt_model
+
+            rt_model = await run_transaction(self.sessionmaker, _rotate_refresh_token)
+            if rt_model is None:
+                return TokenBody(refresh_token="", access_token="")
 
             return await self.get_token_strings(
                 profile_id=UUID(rt_claims_model.profile_id),
@@ -180,18 +193,14 @@ class TokenService:
                 logger.info("refresh token verification failed")
                 return TokenVerifyResponse(message="invalid token", valid=False)
 
-            async with self.sessionmaker() as session:
-                # query for token number if already exist get if, else create token entity in db
-                at_model = await self.access_token_repo.get_obj(
-                    session=session, obj_id=UUID(at_claims_model.jti)
-                )
-                logger.debug("tokens : %s", at_model)
-                await session.commit()
+            blacklisted = await self.blacklist_cache.is_blacklisted(
+                jti=at_claims_model.jti
+            )
 
             return (
-                TokenVerifyResponse(valid=True)
-                if at_model is None
-                else TokenVerifyResponse(valid=False, message="token blacklisted")
+                TokenVerifyResponse(valid=False, message="token blacklisted")
+                if blacklisted
+                else TokenVerifyResponse(valid=True)
             )
 
         except Exception as err:
@@ -284,30 +293,30 @@ class TokenService:
                 at_claims_dict
             )
 
-            async with self.sessionmaker() as session:
+            at_expires_on = datetime.fromtimestamp(at_claims_model.exp, tz=pytz.utc)
+
+            async def _signout(session: AsyncSession):
                 await self.refresh_token_repo.delete_obj_related_by_profile(
                     session=session, profile_id=UUID(rt_claims_model.profile_id)
                 )
+                return await self.access_token_repo.create_obj(
+                    session=session,
+                    p_model=AccessTokenBlacklistCreate(
+                        id=UUID(at_claims_model.jti),
+                        expires_on=at_expires_on,
+                    ),
+                )
 
-                try:
-                    at_model = await self.access_token_repo.create_obj(
-                        session=session,
-                        p_model=AccessTokenBlacklistCreate(
-                            id=UUID(at_claims_model.jti),
-                            expires_on=datetime.fromtimestamp(
-                                at_claims_model.exp, tz=pytz.utc
-                            ),
-                        ),
-                    )
-                    await session.commit()
-                    logger.debug("access token blacklisted : %s", at_model)
-                except IntegrityError as e:
-                    if "unique constraint" in str(e.orig).lower():
-                        logger.info(
-                            "Token already blacklisted: %s", at_claims_model.jti
-                        )
-                        return BaseResponse(message="Already signed out.")
-                    raise  # Re-raise if it's not the specific error we're catching
+            try:
+                at_model = await run_transaction(self.sessionmaker, _signout)
+                self.blacklist_cache.add(at_claims_model.jti, at_expires_on)
+                logger.debug("access token blacklisted : %s", at_model)
+            except IntegrityError as e:
+                if "unique constraint" in str(e.orig).lower():
+                    self.blacklist_cache.add(at_claims_model.jti, at_expires_on)
+                    logger.info("Token already blacklisted: %s", at_claims_model.jti)
+                    return BaseResponse(message="Already signed out.")
+                raise  # Re-raise if it's not the specific error we're catching
 
             return BaseResponse(message="Already signed out.")
         except Exception as err:
@@ -5,11 +5,10 @@ from pydantic import UUID4
 from typing import Optional
 from sqlalchemy_cockroachdb import run_transaction
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from ...cockroach_sql.dao.user_dao import UserRepo
 from .model import UserCreate
-from ...cockroach_sql.database import database
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,16 +22,16 @@ class UserService:
     Wraps the database connection. The class methods wrap database transactions.
     """
 
-    def __init__(self):
+    def __init__(self, sessionmaker: async_sessionmaker, user_repo: UserRepo):
         """
-        Establish a connection to the database, creating Engine and Sessionmaker objects.
+        Wire the shared sessionmaker, repositories and clients built by the app container.
 
         Arguments:
-            conn_string {String} -- CockroachDB connection string.
+            sessionmaker {async_sessionmaker} -- process wide CockroachDB sessionmaker.
         """
-        self.sessionmaker = database.get_session()
+        self.sessionmaker = sessionmaker
 
-        self._repo = UserRepo()
+        self._repo = user_repo
 
     async def create_user(self, req_body: UserCreate):
         """
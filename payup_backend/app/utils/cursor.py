@@ -0,0 +1,51 @@
+"""opaque cursors for keyset pagination"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List
+from uuid import UUID
+
+import pytz
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """urlsafe token carrying the sort key of the last row of a page"""
+    payload = json.dumps([_encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    The `size` values packed by encode_cursor, datetimes and uuids come back as
+    strings. Raises ValueError for anything encode_cursor did not produce.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as err:
+        raise ValueError("malformed cursor") from err
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("malformed cursor")
+    return values
+
+
+def decode_timestamp(value: str) -> datetime:
+    """
+    A datetime packed by encode_cursor, as naive UTC. Timestamps read from
+    TIMESTAMPTZ columns come back aware, the DateTime columns they are
+    compared with bind naive values.
+    """
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(pytz.UTC).replace(tzinfo=None)
+    return timestamp
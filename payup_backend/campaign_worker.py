@@ -0,0 +1,48 @@
+"""
+Promotion campaign worker, pushes promotions to every opted in user.
+
+`--promotion-id` starts a new campaign for that promotion. Every campaign
+still running is then claimed and sent from its last checkpoint, ones claimed
+by a worker that crashed once their lease lapses. Workers running side by side
+never send the same campaign.
+"""
+
+import argparse
+import asyncio
+import logging
+import logging.config
+from typing import Optional
+
+from .app.config.logging import LogConfig
+from .app.container import container
+
+log_config = LogConfig()
+logging.config.dictConfig(log_config.logging_config)
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(promotion_id: Optional[int] = None):
+    await container.notification_writer.start()
+    try:
+        if promotion_id is not None:
+            campaign = await container.campaign_sender.create_campaign(promotion_id)
+            logger.info("created campaign %s", campaign.campaign_id)
+        await container.campaign_sender.run_pending()
+    finally:
+        # buffered inbox records are written before exiting
+        await container.notification_writer.stop()
+        await container.expo_client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="send promotion push campaigns")
+    parser.add_argument(
+        "--promotion-id", type=int, help="start a new campaign for this promotion"
+    )
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.promotion_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,13 +15,24 @@ from .app.config.errors import (
 from .app.config.constants import get_settings
 from .app.app import router as api_router
 from .app.helperClass.logging_lib import LoggingMiddleware
+from .app.container import container
+from .app.helperClass.metrics import metrics
 
 log_config = LogConfig()
 logging.config.dictConfig(log_config.logging_config)
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # per worker state, loaded before the first request is served
+    await container.startup()
+    yield
+    await container.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app_setting = get_settings()
 
 # adding middlewares
@@ -35,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 # adding exception handlers
 app.add_exception_handler(HTTPException, CustomExceptionHandler.http_exception_handler)
@@ -58,4 +71,9 @@ async def root():
     return {"message": "Welcome to PayUp"}
 
 
+@app.get("/metrics")
+async def read_metrics():
+    return metrics.snapshot()
+
+
 app.include_router(api_router, prefix="/api")
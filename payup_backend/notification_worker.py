@@ -0,0 +1,46 @@
+"""
+Notification outbox worker, delivers queued pushes outside the api processes
+and checks their receipts for dead tokens.
+
+Run any number of these side by side, they split due rows between them.
+"""
+
+import asyncio
+import logging
+import logging.config
+import signal
+
+from .app.config.logging import LogConfig
+from .app.container import container
+
+log_config = LogConfig()
+logging.config.dictConfig(log_config.logging_config)
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await container.notification_dispatcher.start()
+    await container.push_receipt_poller.start()
+    logger.info("notification worker started")
+    try:
+        await stop.wait()
+    finally:
+        # the batch in flight settles before the client is closed
+        await container.notification_dispatcher.stop()
+        await container.push_receipt_poller.stop()
+        await container.expo_client.aclose()
+        logger.info("notification worker stopped")
+
+
+def main():
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()